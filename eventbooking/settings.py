@@ -4,7 +4,7 @@ Django settings for eventbooking project.
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,6 +39,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'events.metrics.MetricsMiddleware',
+    'events.instrumentation.QueryInstrumentationMiddleware',
+    'events.pagecache.PublicPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,6 +91,24 @@ DATABASES = {
 }
 
 
+# Cache
+# Defaults to a per-process cache; point CACHE_BACKEND/CACHE_LOCATION at
+# Redis or Memcached to share cached data between workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='eventbooking'),
+    }
+}
+
+
+# ProfileBackend loads the user's profile along with the user for role
+# checks. ModelBackend stays listed so sessions created before it still load.
+AUTHENTICATION_BACKENDS = [
+    'events.backends.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -125,6 +147,32 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # collectstatic builds the bundles, hashes file names and writes .gz/.br copies
+    'staticfiles': {'BACKEND': 'events.storage.BundledStaticFilesStorage'},
+}
+
+# Bundles built into STATIC_ROOT/bundles/ by collectstatic and included with
+# {% bundle %}. With bundling off (DEBUG) the sources are included one by one.
+STATIC_BUNDLES = {
+    'base.css': [
+        'vendor/bootstrap/bootstrap.min.css',
+        'vendor/bootstrap-icons/bootstrap-icons.min.css',
+        'css/style.css',
+    ],
+    'base.js': ['vendor/bootstrap/popper.min.js', 'vendor/bootstrap/bootstrap.min.js'],
+    'user.css': ['css/navbar.css'],
+    'user.js': ['js/navbar.js'],
+    'admin.js': ['js/admin.js'],
+    'dashboard.js': ['vendor/chartjs/chart.umd.js'],
+    'home.css': ['css/home.css'],
+    'home.js': ['js/home.js'],
+    'auth.css': ['css/auth.css'],
+    'auth.js': ['js/auth.js'],
+}
+STATIC_BUNDLES_ENABLED = config('STATIC_BUNDLES_ENABLED', default=not DEBUG, cast=bool)
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -141,6 +189,12 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 # Session timeout (30 minutes)
 SESSION_COOKIE_AGE = 1800
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
+# Idle-timeout tracking is only written back when it moves by this many
+# seconds, so sessions time out up to this much early
+SESSION_ACTIVITY_GRANULARITY = 60
+# Use django.contrib.sessions.backends.cached_db or .cache (with a shared
+# CACHE_BACKEND), or .signed_cookies, to take sessions off the database
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
 
 # Login settings
 LOGIN_URL = '/login/'
@@ -150,6 +204,103 @@ LOGOUT_REDIRECT_URL = '/'
 # Account lockout settings
 MAX_LOGIN_ATTEMPTS = 3
 LOCKOUT_TIME = 300  # 5 minutes
+# Failed logins allowed per client IP in any LOGIN_IP_WINDOW seconds
+LOGIN_IP_MAX_ATTEMPTS = 20
+LOGIN_IP_WINDOW = 300
+# The counters live in this cache; use a shared one (CACHE_BACKEND) when
+# running several workers so they all see the same counts
+LOGIN_THROTTLE_CACHE = 'default'
+# Request header with the real client IP when behind a proxy, e.g. HTTP_X_REAL_IP
+CLIENT_IP_HEADER = config('CLIENT_IP_HEADER', default='')
+
+# Event search backend: 'auto' uses MySQL FULLTEXT on MySQL and the
+# inverted index table everywhere else; 'mysql' or 'index' forces one
+EVENT_SEARCH_BACKEND = config('EVENT_SEARCH_BACKEND', default='auto')
+
+# Upper bound for the approximate result count shown with cursor pagination
+PAGINATION_COUNT_LIMIT = 1000
+
+# Seats are held for unfinished bookings this long (seconds); run
+# `manage.py expire_booking_holds` periodically to release abandoned ones
+BOOKING_HOLD_TTL = 900  # 15 minutes
+
+# Add-on package catalog cache; with a per-process cache each worker
+# reloads its copy at most this often (seconds)
+PACKAGE_CATALOG_CACHE = 'default'
+PACKAGE_CATALOG_LOCAL_TTL = 60
+
+# Rendered event cards and detail bodies, see events.fragments. Keys change
+# with the event, so the timeout only bounds how long unused ones linger.
+FRAGMENT_CACHE = 'default'
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Whole home and event pages cached for anonymous visitors (events.pagecache).
+# Event and category changes invalidate them at once with a shared cache; a
+# per-process cache only sees the workers' own changes, so the timeout also
+# bounds how stale a page can get there. PUBLIC_PAGE_MAX_AGE is the
+# Cache-Control max-age sent to browsers and proxies (0: always revalidate).
+PUBLIC_PAGE_CACHE_ENABLED = config('PUBLIC_PAGE_CACHE_ENABLED', default=not DEBUG, cast=bool)
+PUBLIC_PAGE_CACHE = 'default'
+PUBLIC_PAGE_CACHE_TIMEOUT = 300
+PUBLIC_PAGE_MAX_AGE = config('PUBLIC_PAGE_MAX_AGE', default=0, cast=int)
+
+# Door scanners authenticate to the check-in API with one of these keys
+# (sent as the X-Checkin-Key header)
+CHECKIN_API_KEYS = config('CHECKIN_API_KEYS', default='', cast=Csv())
+CHECKIN_BATCH_LIMIT = 1000
+# Drawn ticket QR codes are cached this long (seconds); the browser keeps
+# its copy for as long
+CHECKIN_QR_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Bearer tokens issued by /api/auth/token/ for the read API stay valid this
+# long (seconds), or until the user's password changes
+API_TOKEN_MAX_AGE = 30 * 24 * 60 * 60
+
+# Offline PDF and Excel reports (kept outside MEDIA_ROOT so they are not publicly served)
+BOOKING_REPORTS_DIR = BASE_DIR / 'reports'
+BOOKING_REPORT_MAX_AGE = 600  # 10 minutes
+# Exports running at once across all web workers; each uses a process pool
+BOOKING_REPORT_MAX_JOBS = 2
+
+# Most queries a page may run before it is logged as over budget (checked in
+# DEBUG by events.instrumentation; use query_budget() to enforce in tests).
+# Counts include the session, user and profile lookups done by the layout.
+QUERY_BUDGETS = {
+    'home': 7,
+    'event_detail': 5,
+    'booking_detail': 5,
+    'my_bookings': 6,
+    'admin_dashboard': 7,
+    'admin_reports': 6,
+    'admin_events': 4,
+    'admin_bookings': 6,
+    'admin_users': 4,
+    'admin_user_bookings': 5,
+    'admin_services': 5,
+    'api_events': 3,
+    'api_event_detail': 2,
+    'api_bookings': 3,
+}
+
+# Request metrics served at /metrics. Each worker writes its counts to a file
+# here; clear the directory when the server restarts
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = 5  # seconds
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Chunked event video uploads; unfinished uploads are dropped after a day
+VIDEO_UPLOAD_TEMP_DIR = BASE_DIR / 'uploads'
+VIDEO_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+VIDEO_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+VIDEO_UPLOAD_EXTENSIONS = ['.mp4', '.m4v', '.webm', '.mov']
+VIDEO_UPLOAD_EXPIRY = 86400
+
+# Let the web server send event videos: 'nginx' (X-Accel-Redirect to an
+# internal location aliased to MEDIA_ROOT at MEDIA_SENDFILE_PREFIX) or
+# 'sendfile' (X-Sendfile, Apache/lighttpd). Empty streams them from Django.
+MEDIA_SENDFILE = config('MEDIA_SENDFILE', default='')
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
 
 # Captcha settings
 CAPTCHA_CHALLENGE_FUNCT = 'captcha.helpers.random_char_challenge'
@@ -7,9 +7,11 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
+    # Ahead of the Django admin, whose catch-all view would otherwise answer
+    # the custom admin pages (admin/dashboard/, admin/users/, ...)
+    path('', include('events.urls')),
     path('admin/', admin.site.urls),
     path('captcha/', include('captcha.urls')),
-    path('', include('events.urls')),
 ]
 
 if settings.DEBUG:
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     UserProfile, EventCategory, Event, PhotographyPackage,
-    CateringPackage, Booking, BookingService
+    CateringPackage, Booking, BookingService, BookingHold
 )
 
 
@@ -49,3 +49,9 @@ class BookingServiceAdmin(admin.ModelAdmin):
     list_display = ['booking', 'service_type', 'service_price']
     list_filter = ['service_type']
 
+
+
+@admin.register(BookingHold)
+class BookingHoldAdmin(admin.ModelAdmin):
+    list_display = ['user', 'event', 'created_at', 'expires_at']
+    readonly_fields = ['created_at']
@@ -0,0 +1,223 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.crypto import constant_time_compare
+
+from .models import Booking, BookingService, Event
+from .pagination import InvalidCursor, KeysetPaginator
+
+
+API_TOKEN_SALT = 'events.api'
+
+# Public field name -> values() lookup or expression. Guests see what the
+# event pages show them; dates, places and prices need a login there too.
+EVENT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'category': 'category__name',
+    'event_type': 'event_type',
+    'date': 'date',
+    'time': 'time',
+    'location': 'location',
+    'organizer': 'organizer',
+    'price': 'price',
+    'capacity': 'capacity',
+    'registration_enabled': 'registration_enabled',
+    'updated_at': 'updated_at',
+}
+EVENT_DETAIL_FIELDS = {
+    **EVENT_FIELDS,
+    # Events created before the seat inventory existed have no row yet
+    'seats_remaining': Coalesce(F('seat_inventory__remaining'), F('capacity')),
+}
+GUEST_EVENT_FIELDS = {'id', 'title', 'description', 'category', 'event_type', 'updated_at'}
+DEFAULT_EVENT_FIELDS = ('id', 'title', 'category', 'event_type', 'date', 'time', 'location', 'price')
+
+BOOKING_FIELDS = {
+    'id': 'id',
+    'event': 'event_id',
+    'event_title': 'event__title',
+    'event_date': 'event__date',
+    'status': 'status',
+    'event_fee': 'event_fee',
+    'total_amount': 'total_amount',
+    'booking_date': 'booking_date',
+    'attendance_marked': 'attendance_marked',
+    # Filled from a second query, see user_bookings()
+    'services': None,
+}
+DEFAULT_BOOKING_FIELDS = ('id', 'event', 'event_title', 'event_date', 'status', 'total_amount', 'booking_date', 'services')
+SERVICE_FIELDS = {
+    'service_type': 'service_type',
+    'photography_package': 'photography_package__name',
+    'photo_type': 'photo_type',
+    'duration': 'duration',
+    'delivery_method': 'delivery_method',
+    'catering_package': 'catering_package__name',
+    'food_type': 'food_type',
+    'plate_count': 'plate_count',
+    'service_price': 'service_price',
+}
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Authentication
+
+def make_api_token(user):
+    # The password hash part makes a password change revoke old tokens
+    return signing.TimestampSigner(salt=API_TOKEN_SALT).sign(f'{user.pk}.{user.get_session_auth_hash()}')
+
+
+def get_api_user(request):
+    """The user of a valid "Authorization: Bearer <token>" header, None without one."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    try:
+        value = signing.TimestampSigner(salt=API_TOKEN_SALT).unsign(token, max_age=settings.API_TOKEN_MAX_AGE)
+        user_id, auth_hash = value.split('.', 1)
+        user = User.objects.filter(pk=int(user_id), is_active=True).only('id', 'password').first()
+    except (signing.BadSignature, ValueError):
+        raise APIError('Invalid or expired token.', status=401)
+    if user is None or not constant_time_compare(auth_hash, user.get_session_auth_hash()):
+        raise APIError('Invalid or expired token.', status=401)
+    return user
+
+
+# Responses
+
+def api_response(request, data):
+    """
+    JSON response with an ETag of its body; a matching If-None-Match gets
+    304 so polling clients only download what changed.
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def parse_fields(request, available, default, allowed=None):
+    """The fields named in ?fields=a,b (or ``default``), checked against ``available`` and ``allowed``."""
+    requested = request.GET.get('fields')
+    if not requested:
+        return [field for field in default if allowed is None or field in allowed]
+    fields = list(dict.fromkeys(field.strip() for field in requested.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise APIError(f'Unknown field{"s" if len(unknown) > 1 else ""}: {", ".join(unknown)}.')
+    if allowed is not None:
+        restricted = [field for field in fields if field not in allowed]
+        if restricted:
+            raise APIError(f'Log in to read: {", ".join(restricted)}.', status=401)
+    return fields
+
+
+def parse_limit(request, default=20, maximum=100):
+    try:
+        return min(max(int(request.GET.get('limit', default)), 1), maximum)
+    except ValueError:
+        raise APIError('limit must be a number.')
+
+
+def _values(queryset, spec, fields, extra=()):
+    """values() with only the requested columns (plus ``extra``, e.g. the ordering), renamed to the public names."""
+    lookups = {}
+    expressions = {}
+    for field in fields:
+        source = spec[field]
+        if source is None:
+            continue
+        if isinstance(source, str):
+            lookups[field] = source
+        else:
+            expressions[field] = source
+    columns = list(dict.fromkeys([*lookups.values(), *extra]))
+    return queryset.values(*columns, **expressions), lookups
+
+
+def _rename(row, fields, lookups):
+    return {field: row[lookups[field]] if field in lookups else row.get(field) for field in fields}
+
+
+def _page(paginator, request, rows_to_data):
+    try:
+        page = paginator.get_page(request.GET.get('cursor'), strict=True)
+    except InvalidCursor:
+        raise APIError('Invalid cursor.')
+    return {
+        'results': rows_to_data(page.object_list),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+# Endpoints
+
+def event_list(request, form, user):
+    fields = parse_fields(request, EVENT_FIELDS, DEFAULT_EVENT_FIELDS, None if user else GUEST_EVENT_FIELDS)
+    events = Event.objects.all()
+    ordering = ('-date', '-id')
+    if form.is_valid():
+        events = form.filter_queryset(events)
+        if form.cleaned_data.get('search'):
+            ordering = ('-search_rank',) + ordering
+    queryset, lookups = _values(events, EVENT_FIELDS, fields, extra=[field.lstrip('-') for field in ordering])
+    paginator = KeysetPaginator(queryset, parse_limit(request), ordering)
+    return _page(paginator, request, lambda rows: [_rename(row, fields, lookups) for row in rows])
+
+
+def event_detail(request, event_id, user):
+    fields = parse_fields(
+        request, EVENT_DETAIL_FIELDS, DEFAULT_EVENT_FIELDS + ('description', 'organizer', 'seats_remaining'),
+        None if user else GUEST_EVENT_FIELDS,
+    )
+    queryset, lookups = _values(Event.objects.filter(id=event_id), EVENT_DETAIL_FIELDS, fields)
+    row = queryset.first()
+    if row is None:
+        raise APIError('Event not found.', status=404)
+    data = _rename(row, fields, lookups)
+    if 'seats_remaining' in data:
+        data['seats_remaining'] = max(data['seats_remaining'], 0)
+    return data
+
+
+def user_bookings(request, user):
+    fields = parse_fields(request, BOOKING_FIELDS, DEFAULT_BOOKING_FIELDS)
+    ordering = ('-booking_date', '-id')
+    queryset, lookups = _values(
+        Booking.objects.filter(user=user), BOOKING_FIELDS, fields, extra=['id', 'booking_date'],
+    )
+
+    def serialize(rows):
+        results = [_rename(row, fields, lookups) for row in rows]
+        if 'services' in fields:
+            services = {row['id']: [] for row in rows}
+            for service in BookingService.objects.filter(booking_id__in=services).order_by('id').values(
+                'booking_id', *SERVICE_FIELDS.values(),
+            ):
+                services[service['booking_id']].append(
+                    {name: service[lookup] for name, lookup in SERVICE_FIELDS.items()}
+                )
+            for row, result in zip(rows, results):
+                result['services'] = services[row['id']]
+        return results
+
+    return _page(KeysetPaginator(queryset, parse_limit(request), ordering), request, serialize)
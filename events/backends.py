@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .models import UserProfile
+
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's profile in the same query as the user,
+    so role checks on every request cost no extra queries and always see the
+    current role.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None and (username or kwargs.get(UserModel.USERNAME_FIELD)):
+            # Stop here rather than let ModelBackend hash the same wrong password again
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('userprofile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def get_role(user):
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.userprofile.role
+    except UserProfile.DoesNotExist:
+        return None
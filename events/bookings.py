@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+
+def filter_bookings(bookings, params):
+    # Shared by the booking list and the exports so both honor the same filters
+    filters = {
+        'event': params.get('event'),
+        'status': params.get('status'),
+        'date': params.get('date'),
+    }
+    if filters['event']:
+        bookings = bookings.filter(event_id=filters['event'])
+    if filters['status']:
+        bookings = bookings.filter(status=filters['status'])
+    if filters['date']:
+        # A range on the raw column can use the booking_date indexes; __date cannot
+        try:
+            day = datetime.strptime(filters['date'], '%Y-%m-%d')
+        except ValueError:
+            day = None
+        if day is not None:
+            start = timezone.make_aware(day)
+            bookings = bookings.filter(booking_date__gte=start, booking_date__lt=start + timedelta(days=1))
+    return bookings, filters
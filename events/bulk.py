@@ -0,0 +1,52 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import reports, rollups
+from .reservations import holds_seat, release_seats, take_seats
+
+
+def bulk_update_status(bookings, status):
+    """
+    Sets ``status`` on every booking in the queryset with one UPDATE and
+    returns the number of bookings changed. Seat counters and rollups,
+    which are normally maintained by signals, are adjusted per event.
+    """
+    changing = bookings.exclude(status=status).order_by()
+    with transaction.atomic():
+        # Lock the rows first so the adjustments match exactly what the UPDATE changes
+        rows = list(changing.select_for_update().values_list('event_id', 'status', 'booking_date'))
+        if not rows:
+            return 0
+        groups = Counter((event_id, old_status) for event_id, old_status, _ in rows)
+        updated = changing.update(status=status)
+        
+        seat_changes = Counter()
+        for (event_id, old_status), count in groups.items():
+            if holds_seat(old_status) and not holds_seat(status):
+                seat_changes[event_id] += count
+            elif not holds_seat(old_status) and holds_seat(status):
+                seat_changes[event_id] -= count
+        for event_id, count in seat_changes.items():
+            if count > 0:
+                release_seats(event_id, count)
+            elif count < 0:
+                take_seats(event_id, -count)
+        
+        status_counts = Counter()
+        for (event_id, old_status), count in groups.items():
+            status_counts[old_status] += count
+
+        def apply_rollups():
+            for old_status, count in status_counts.items():
+                rollups.booking_status_changed(old_status, status, count)
+        transaction.on_commit(apply_rollups)
+        for day, event_id in {(timezone.localdate(booking_date), event_id) for event_id, _, booking_date in rows}:
+            reports.schedule_refresh(day, event_id)
+    return updated
+
+
+def bulk_mark_attendance(bookings, attended=True):
+    # Only the attendance column is written, and only for rows that change
+    return bookings.exclude(attendance_marked=attended).order_by().update(attendance_marked=attended)
@@ -0,0 +1,72 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import CateringPackage, PhotographyPackage
+
+
+VERSION_KEY = 'events:package-catalog:version'
+CATALOG_KEY = 'events:package-catalog:{version}'
+
+# Per-process copy, reused for as long as the shared version does not change
+_process_catalog = {'version': None, 'loaded_at': 0, 'catalog': None}
+
+
+class PackageCatalog:
+    def __init__(self, photography_packages, catering_packages):
+        self.photography_packages = photography_packages
+        self.catering_packages = catering_packages
+        self.photography_by_id = {package.id: package for package in photography_packages}
+        self.catering_by_id = {package.id: package for package in catering_packages}
+
+    def get_photography_package(self, package_id):
+        try:
+            return self.photography_by_id.get(int(package_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_catering_package(self, package_id):
+        try:
+            return self.catering_by_id.get(int(package_id))
+        except (TypeError, ValueError):
+            return None
+
+
+def _cache():
+    return caches[getattr(settings, 'PACKAGE_CATALOG_CACHE', 'default')]
+
+
+def _load_catalog():
+    return PackageCatalog(
+        list(PhotographyPackage.objects.filter(is_active=True)),
+        list(CateringPackage.objects.filter(is_active=True)),
+    )
+
+
+def get_package_catalog():
+    cache = _cache()
+    version = cache.get_or_set(VERSION_KEY, uuid.uuid4().hex, None)
+    
+    # A process-local cache cannot see bumps made by other workers, so in
+    # that case the local copy is also given a maximum age
+    shared = not isinstance(cache, LocMemCache)
+    max_age = None if shared else getattr(settings, 'PACKAGE_CATALOG_LOCAL_TTL', 60)
+    local = _process_catalog
+    if local['version'] == version and (max_age is None or time.monotonic() - local['loaded_at'] < max_age):
+        return local['catalog']
+    
+    catalog = cache.get(CATALOG_KEY.format(version=version)) if shared else None
+    if catalog is None:
+        catalog = _load_catalog()
+        if shared:
+            cache.set(CATALOG_KEY.format(version=version), catalog, 24 * 60 * 60)
+    local.update(version=version, loaded_at=time.monotonic(), catalog=catalog)
+    return catalog
+
+
+def invalidate_package_catalog():
+    _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+    _process_catalog.update(version=None, catalog=None)
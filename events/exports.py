@@ -0,0 +1,239 @@
+import fcntl
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from openpyxl import Workbook
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .pagination import iter_keyset
+
+
+EXPORT_ORDERING = ('-booking_date', '-id')
+
+# Report file extension -> management command that writes it
+REPORT_COMMANDS = {
+    'pdf': 'export_bookings_pdf',
+    'xlsx': 'export_bookings_xlsx',
+}
+
+EXPORT_FIELDS = (
+    'id', 'user__username', 'event__title', 'status', 'event_fee',
+    'total_amount', 'booking_date', 'attendance_marked',
+)
+
+
+def iter_booking_rows(bookings, chunk_size=2000):
+    # One joined query per chunk instead of two extra queries per booking
+    return iter_keyset(bookings.values(*EXPORT_FIELDS), EXPORT_ORDERING, chunk_size)
+
+
+def write_bookings_xlsx(bookings, output):
+    """
+    Writes bookings as .xlsx to ``output`` using a write-only worksheet,
+    which keeps memory flat regardless of the number of rows.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Bookings")
+    
+    # Headers
+    ws.append(['User', 'Event', 'Status', 'Event Fee', 'Total Amount', 'Booking Date', 'Attendance'])
+    
+    # Data
+    for row in iter_booking_rows(bookings):
+        ws.append([
+            row['user__username'],
+            row['event__title'],
+            row['status'],
+            float(row['event_fee']),
+            float(row['total_amount']),
+            row['booking_date'].strftime('%Y-%m-%d %H:%M:%S'),
+            'Yes' if row['attendance_marked'] else 'No'
+        ])
+    
+    wb.save(output)
+
+
+# Rows per independently laid out table; roughly ten letter pages
+PDF_ROWS_PER_CHUNK = 400
+
+PDF_HEADERS = ['User', 'Event', 'Status', 'Total Amount', 'Date']
+
+PDF_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+]
+
+
+def render_pdf_chunk(rows, with_title):
+    # Runs in a worker process, so it only touches reportlab
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    
+    if with_title:
+        styles = getSampleStyleSheet()
+        elements.append(Paragraph("Bookings Report", styles['Title']))
+        elements.append(Spacer(1, 12))
+    
+    table = Table([PDF_HEADERS] + rows, repeatRows=1)
+    table.setStyle(TableStyle(PDF_TABLE_STYLE))
+    elements.append(table)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def iter_pdf_chunks(bookings, chunk_size=PDF_ROWS_PER_CHUNK):
+    chunk = []
+    for row in iter_booking_rows(bookings):
+        chunk.append([
+            row['user__username'],
+            row['event__title'],
+            row['status'],
+            str(row['total_amount']),
+            row['booking_date'].strftime('%Y-%m-%d')
+        ])
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_bookings_pdf(bookings, output, workers=None, chunk_size=PDF_ROWS_PER_CHUNK):
+    """
+    Renders page-sized chunks of the bookings report in a process pool and
+    concatenates them, in order, into ``output``.
+    """
+    writer = PdfWriter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Only a bounded number of chunks are in flight at any time
+        max_pending = (workers or os.cpu_count() or 1) * 2
+        pending = deque()
+        for index, chunk in enumerate(iter_pdf_chunks(bookings, chunk_size)):
+            pending.append(pool.submit(render_pdf_chunk, chunk, index == 0))
+            if len(pending) >= max_pending:
+                writer.append(PdfReader(BytesIO(pending.popleft().result())))
+        if not pending and not len(writer.pages):
+            pending.append(pool.submit(render_pdf_chunk, [], True))
+        while pending:
+            writer.append(PdfReader(BytesIO(pending.popleft().result())))
+    writer.write(output)
+
+
+def normalize_report_filters(filters):
+    return {key: str(value) for key, value in filters.items() if value}
+
+
+def booking_report_path(filters, extension='pdf'):
+    key = hashlib.sha1(json.dumps(normalize_report_filters(filters), sort_keys=True).encode()).hexdigest()[:12]
+    return Path(settings.BOOKING_REPORTS_DIR) / f'bookings-{key}.{extension}'
+
+
+def partial_report_path(report_path):
+    return report_path.with_name(report_path.name + '.partial')
+
+
+def report_log_path(report_path):
+    return report_path.with_name(report_path.name + '.log')
+
+
+class ReportQueueFull(Exception):
+    pass
+
+
+def write_report(report_path, render):
+    """Calls ``render(output)`` on a partial file and moves it into place once complete."""
+    partial_path = partial_report_path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(partial_path, 'wb') as output:
+            render(output)
+        # Readers never see a half-written report
+        os.replace(partial_path, report_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def is_report_fresh(report_path):
+    return report_path.exists() and time.time() - report_path.stat().st_mtime < settings.BOOKING_REPORT_MAX_AGE
+
+
+def is_report_running(partial_path):
+    """
+    True while the export writing ``partial_path`` is alive. The process
+    inherits a lock on the file from start_booking_report() and holds it
+    until it exits, however it exits.
+    """
+    try:
+        fd = os.open(partial_path, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
+
+
+def start_booking_report(filters, extension='pdf'):
+    """
+    Starts the export command for ``extension`` (see REPORT_COMMANDS) in a
+    detached process, whose output and errors go to report_log_path().
+    Returns False if a report for the same filters is already being
+    generated and raises ReportQueueFull when BOOKING_REPORT_MAX_JOBS are.
+    """
+    report_path = booking_report_path(filters, extension)
+    partial_path = partial_report_path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(report_path.parent / '.jobs.lock', 'w') as jobs_lock:
+        # One web worker at a time counts the running exports and starts one
+        fcntl.flock(jobs_lock, fcntl.LOCK_EX)
+        running = 0
+        for path in report_path.parent.glob('*.partial'):
+            if is_report_running(path):
+                if path == partial_path:
+                    return False
+                running += 1
+            else:
+                # Left behind by an export that died before it could clean up
+                path.unlink(missing_ok=True)
+        if running >= settings.BOOKING_REPORT_MAX_JOBS:
+            raise ReportQueueFull
+
+        command = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), REPORT_COMMANDS[extension]]
+        for key, value in normalize_report_filters(filters).items():
+            command += [f'--{key}', value]
+        with open(partial_path, 'wb') as marker, open(report_log_path(report_path), 'wb') as log:
+            fcntl.flock(marker, fcntl.LOCK_EX)
+            subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                pass_fds=[marker.fileno()],
+                start_new_session=True,
+            )
+    return True
@@ -1,8 +1,13 @@
+from datetime import timedelta
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.utils import timezone
 from captcha.fields import CaptchaField
-from .models import Event, Booking, BookingService, PhotographyPackage, CateringPackage, UserProfile, EventCategory
+from .catalog import get_package_catalog
+from .images import ensure_renditions
+from .models import Event, Booking, BookingService, PhotographyPackage, CateringPackage, UserProfile, EventCategory, VideoUpload
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -45,6 +50,25 @@ class EventSearchForm(forms.Form):
         super().__init__(*args, **kwargs)
         self.fields['category'].queryset = EventCategory.objects.all()
 
+    def filter_queryset(self, events):
+        # Text and location lookups go through the search index instead of icontains scans
+        from .search import search_events
+
+        search = self.cleaned_data.get('search')
+        category = self.cleaned_data.get('category')
+        event_type = self.cleaned_data.get('event_type')
+        location = self.cleaned_data.get('location')
+
+        if category:
+            events = events.filter(category=category)
+        if event_type:
+            events = events.filter(event_type=event_type)
+        if location:
+            events = search_events(events, location, fields=['location'])
+        if search:
+            events = search_events(events, search)
+        return events
+
 
 class BookingForm(forms.ModelForm):
     class Meta:
@@ -52,15 +76,24 @@ class BookingForm(forms.ModelForm):
         fields = ['notes']
 
 
+def photography_package_choices():
+    return [('', '---------')] + [(package.id, package.name) for package in get_package_catalog().photography_packages]
+
+
+def catering_package_choices():
+    return [('', '---------')] + [(package.id, str(package)) for package in get_package_catalog().catering_packages]
+
+
 class PhotographyServiceForm(forms.Form):
-    package = forms.ModelChoiceField(queryset=PhotographyPackage.objects.filter(is_active=True), required=False)
+    # Choices come from the cached package catalog instead of a queryset
+    package = forms.TypedChoiceField(choices=photography_package_choices, coerce=int, required=False)
     photo_type = forms.ChoiceField(choices=PhotographyPackage.PHOTO_TYPES, required=False)
     duration = forms.ChoiceField(choices=PhotographyPackage.DURATION_CHOICES, required=False)
     delivery_method = forms.ChoiceField(choices=PhotographyPackage.DELIVERY_CHOICES, required=False)
 
 
 class CateringServiceForm(forms.Form):
-    package = forms.ModelChoiceField(queryset=CateringPackage.objects.filter(is_active=True), required=False)
+    package = forms.TypedChoiceField(choices=catering_package_choices, coerce=int, required=False)
     food_type = forms.ChoiceField(choices=[
         ('', 'Select Food Type'),
         ('veg', 'Vegetarian'),
@@ -76,6 +109,29 @@ class EventForm(forms.ModelForm):
         fields = ['title', 'description', 'category', 'event_type', 'date', 'time',
                   'location', 'organizer', 'price', 'capacity', 'image', 'video', 'registration_enabled']
 
+    # Set by the chunked uploader in place of posting the video file itself
+    video_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
+    def clean_video_upload(self):
+        upload_id = self.cleaned_data.get('video_upload')
+        if not upload_id:
+            return None
+        upload = VideoUpload.objects.filter(id=upload_id).exclude(video='').first()
+        if upload is None:
+            raise forms.ValidationError('The video upload has not finished. Please upload it again.')
+        return upload
+
+    def save(self, commit=True):
+        upload = self.cleaned_data.get('video_upload')
+        if upload:
+            self.instance.video = upload.video
+        event = super().save(commit)
+        if commit:
+            if upload:
+                upload.delete()
+            ensure_renditions(event)
+        return event
+
 
 class PhotographyPackageForm(forms.ModelForm):
     class Meta:
@@ -90,3 +146,52 @@ class CateringPackageForm(forms.ModelForm):
         fields = ['name', 'description', 'meal_type', 'price_per_plate', 'supports_veg',
                   'supports_nonveg', 'menu_type', 'is_active']
 
+
+
+class BookingFilterForm(forms.Form):
+    """The admin booking filters, checked before a report is started for them."""
+    event = forms.IntegerField(required=False, min_value=1)
+    status = forms.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    date = forms.DateField(required=False, input_formats=['%Y-%m-%d'])
+
+    def get_filters(self):
+        """The cleaned filters in the form filter_bookings() takes them."""
+        day = self.cleaned_data['date']
+        return {
+            'event': self.cleaned_data['event'],
+            'status': self.cleaned_data['status'],
+            'date': day.isoformat() if day else None,
+        }
+
+
+class ReportForm(forms.Form):
+    GROUP_CHOICES = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+        ('event', 'Event'),
+        ('category', 'Category'),
+        ('status', 'Status'),
+    ]
+
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    group = forms.ChoiceField(choices=GROUP_CHOICES, required=False)
+    status = forms.MultipleChoiceField(choices=Booking.STATUS_CHOICES, required=False,
+                                       widget=forms.CheckboxSelectMultiple)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Missing values fall back to the last 30 days grouped by day
+        cleaned_data['end'] = cleaned_data.get('end') or timezone.localdate()
+        cleaned_data['start'] = cleaned_data.get('start') or cleaned_data['end'] - timedelta(days=29)
+        cleaned_data['group'] = cleaned_data.get('group') or 'day'
+        if cleaned_data['start'] > cleaned_data['end']:
+            raise forms.ValidationError('The start date must not be after the end date.')
+        return cleaned_data
+
+    def get_options(self):
+        """The cleaned options, or the defaults when they do not validate."""
+        if self.is_valid():
+            return self.cleaned_data
+        end = timezone.localdate()
+        return {'start': end - timedelta(days=29), 'end': end, 'group': 'day', 'status': []}
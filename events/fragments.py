@@ -0,0 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+
+FRAGMENT_KEY = 'events:fragment:{template}:{event_id}:{stamp}:{state}'
+
+
+def _cache():
+    return caches[getattr(settings, 'FRAGMENT_CACHE', 'default')]
+
+
+def _template_digest(template):
+    # Part of every key, so a deploy that changes the markup starts afresh
+    return hashlib.sha1(template.template.source.encode()).hexdigest()[:12]
+
+
+def fragment_key(template_digest, event, user, context):
+    # updated_at changes on every event save and, via the signals, on every
+    # save of its category. Renditions are added without touching it.
+    stamp = f'{event.updated_at.timestamp()}.{int(bool(event.image_renditions))}'
+    state = 'auth' if user.is_authenticated else 'anon'
+    if context:
+        state += ':' + hashlib.sha1(repr(sorted(context.items())).encode()).hexdigest()[:12]
+    return FRAGMENT_KEY.format(template=template_digest, event_id=event.id, stamp=stamp, state=state)
+
+
+def render_event_fragments(template_name, events, user, **context):
+    """
+    Render ``template_name`` for each event with ``event``, ``user`` and
+    ``context``, reusing cached copies. All fragments of a page are fetched
+    in one cache round trip. Returns {event.id: html}.
+    """
+    cache = _cache()
+    template = get_template(template_name)
+    digest = _template_digest(template)
+    keys = {event.id: fragment_key(digest, event, user, context) for event in events}
+    fragments = cache.get_many(list(keys.values()))
+
+    rendered = {}
+    missing = {}
+    for event in events:
+        html = fragments.get(keys[event.id])
+        if html is None:
+            html = template.render({'event': event, 'user': user, **context})
+            missing[keys[event.id]] = html
+        rendered[event.id] = mark_safe(html)
+    if missing:
+        cache.set_many(missing, settings.FRAGMENT_CACHE_TIMEOUT)
+    return rendered
+
+
+def render_event_fragment(template_name, event, user, **context):
+    return render_event_fragments(template_name, [event], user, **context)[event.id]
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, BookingHold, BookingService
+from .reservations import SoldOut, release_seats, reserve_seats
+
+
+class HoldExpired(Exception):
+    pass
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, 'BOOKING_HOLD_TTL', 900))
+
+
+def active_holds(user, event):
+    return BookingHold.objects.filter(user=user, event=event, expires_at__gt=timezone.now()).order_by('-expires_at')
+
+
+def create_hold(user, event):
+    """
+    Hold a seat for the user, or renew the hold they already have on the
+    event, so re-submitting step 1 never holds a second seat.
+    """
+    for attempt in range(2):
+        with transaction.atomic():
+            hold = active_holds(user, event).select_for_update().first()
+            if hold is not None:
+                hold.expires_at = timezone.now() + hold_ttl()
+                hold.save(update_fields=['expires_at'])
+                return hold
+            if reserve_seats(event.id):
+                return BookingHold.objects.create(
+                    user=user,
+                    event=event,
+                    expires_at=timezone.now() + hold_ttl(),
+                )
+        # Seats held by abandoned bookings may not have been swept yet
+        if not release_expired_holds(BookingHold.objects.filter(event=event)):
+            break
+    raise SoldOut(event.id)
+
+
+def expire_hold(hold):
+    with transaction.atomic():
+        if BookingHold.objects.filter(id=hold.id).delete()[0]:
+            release_seats(hold.event_id)
+
+
+def release_expired_holds(holds=None, batch_size=500):
+    """Deletes expired holds in batches, returning their seats. Returns the number expired."""
+    holds = (holds if holds is not None else BookingHold.objects.all()).filter(expires_at__lte=timezone.now())
+    expired = 0
+    while True:
+        with transaction.atomic():
+            batch = list(holds.order_by('expires_at').values_list('id', 'event_id')[:batch_size])
+            if not batch:
+                return expired
+            by_event = {}
+            for hold_id, event_id in batch:
+                by_event.setdefault(event_id, []).append(hold_id)
+            for event_id, hold_ids in by_event.items():
+                # Only release what this process actually deleted, in case another sweeper raced us
+                deleted = BookingHold.objects.filter(id__in=hold_ids).delete()[0]
+                release_seats(event_id, deleted)
+                expired += deleted
+
+
+# Wizard steps are staged in the session, keyed by hold id, and only
+# written to the database by confirm_booking()
+SESSION_KEY = 'booking_wizard'
+
+
+class StagedBooking:
+    def __init__(self, hold, data):
+        self.id = hold.id
+        self.hold = hold
+        self.event = hold.event
+        self.expires_at = hold.expires_at
+        self.event_fee = Decimal(data['event_fee'])
+        self.notes = data.get('notes', '')
+        self.services = data.get('services', [])
+        self.total_amount = self.event_fee + sum(Decimal(service['service_price']) for service in self.services)
+
+    def build_services(self, booking=None):
+        return [BookingService(booking=booking, **service) for service in self.services]
+
+
+def serialize_service(**fields):
+    fields['service_price'] = str(fields['service_price'])
+    return fields
+
+
+def stage_booking(session, hold, **data):
+    wizard = session.get(SESSION_KEY, {})
+    wizard.setdefault(str(hold.id), {}).update(data)
+    session[SESSION_KEY] = wizard
+
+
+def get_staged_booking(session, hold):
+    data = session.get(SESSION_KEY, {}).get(str(hold.id))
+    return StagedBooking(hold, data) if data else None
+
+
+def unstage_booking(session, hold_id):
+    wizard = session.get(SESSION_KEY, {})
+    if wizard.pop(str(hold_id), None) is not None:
+        session[SESSION_KEY] = wizard
+
+
+def confirm_booking(staged):
+    """Writes the booking and its services in one transaction: a booking INSERT and one bulk INSERT."""
+    with transaction.atomic():
+        # Claiming the hold first means a concurrent sweep cannot release its seat under us
+        if not BookingHold.objects.filter(id=staged.id, expires_at__gt=timezone.now()).delete()[0]:
+            raise HoldExpired(staged.id)
+        booking = Booking(
+            user_id=staged.hold.user_id,
+            event=staged.event,
+            event_fee=staged.event_fee,
+            total_amount=staged.total_amount,
+            notes=staged.notes,
+        )
+        # The hold's seat carries over to the booking
+        booking._seat_reserved = True
+        booking.save()
+        BookingService.objects.bulk_create(staged.build_services(booking))
+    return booking
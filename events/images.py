@@ -0,0 +1,126 @@
+import hashlib
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Event
+from .pagecache import invalidate_public_pages
+
+
+# Rendition name -> width in pixels. Images are never scaled up, so a small
+# upload may end up with fewer distinct widths.
+RENDITIONS = {
+    'thumb': 160,
+    'card': 480,
+    'detail': 1200,
+}
+FORMATS = {
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+}
+
+
+def _open_image(field):
+    field.open('rb')
+    try:
+        image = Image.open(field)
+        image.load()
+    finally:
+        field.close()
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG has no alpha channel; flatten onto white like the page background
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _save_rendition(image, base, rendition, image_format):
+    extension, options = FORMATS[image_format]
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format.upper(), **options)
+    data = buffer.getvalue()
+    # Content-hashed names can be cached forever and change whenever the image does
+    digest = hashlib.sha1(data).hexdigest()[:12]
+    name = f'{base}.{rendition}.{digest}.{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def generate_renditions(event):
+    """Resize event.image into every rendition as JPEG and WebP; returns the manifest stored on the event."""
+    image = _open_image(event.image)
+    width, height = image.size
+    base = posixpath.splitext(event.image.name)[0]
+    renditions = {}
+    by_width = {}
+    for rendition, target_width in RENDITIONS.items():
+        target_width = min(target_width, width)
+        if target_width in by_width:
+            # Capped at the original size: share the smaller rendition's files
+            renditions[rendition] = by_width[target_width]
+            continue
+        resized = image
+        if target_width < width:
+            resized = image.resize((target_width, max(1, round(height * target_width / width))), Image.LANCZOS)
+        renditions[rendition] = {
+            'width': resized.width,
+            'height': resized.height,
+            **{image_format: _save_rendition(resized, base, rendition, image_format) for image_format in FORMATS},
+        }
+        by_width[target_width] = renditions[rendition]
+    return {'source': event.image.name, 'renditions': renditions}
+
+
+def rendition_files(manifest):
+    return {
+        entry[image_format]
+        for entry in (manifest or {}).get('renditions', {}).values()
+        for image_format in FORMATS
+        if entry.get(image_format)
+    }
+
+
+def ensure_renditions(event, force=False):
+    """
+    Bring the event's renditions in line with its current image, deleting
+    files left over from a previous image. Returns True if anything changed.
+    """
+    current = event.image_renditions or {}
+    source = event.image.name if event.image else None
+    if not force and current.get('source') == source:
+        return False
+
+    manifest = generate_renditions(event) if source else {}
+    for name in rendition_files(current) - rendition_files(manifest):
+        default_storage.delete(name)
+
+    event.image_renditions = manifest
+    # update() so regenerating renditions does not count as editing the event
+    Event.objects.filter(pk=event.pk).update(image_renditions=manifest)
+    invalidate_public_pages()
+    return True
+
+
+def get_rendition(event, rendition):
+    return (event.image_renditions or {}).get('renditions', {}).get(rendition)
+
+
+def srcset(event, image_format, up_to):
+    """'url width' candidates for every rendition no larger than ``up_to``."""
+    limit = RENDITIONS[up_to]
+    seen = set()
+    candidates = []
+    for rendition, target_width in RENDITIONS.items():
+        entry = get_rendition(event, rendition)
+        if target_width > limit or not entry or entry['width'] in seen:
+            continue
+        seen.add(entry['width'])
+        candidates.append(f'{default_storage.url(entry[image_format])} {entry["width"]}w')
+    return ', '.join(candidates)
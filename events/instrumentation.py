@@ -0,0 +1,96 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """A database execute_wrapper that counts queries and their total time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def get_query_budget(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+@contextmanager
+def query_budget(view_name=None, max_queries=None):
+    """
+    For tests: fails with QueryBudgetExceeded if the block runs more queries
+    than ``max_queries`` or the budget configured for ``view_name`` in
+    settings.QUERY_BUDGETS.
+
+        with query_budget('admin_bookings'):
+            client.get(reverse('admin_bookings'))
+    """
+    limit = max_queries if max_queries is not None else get_query_budget(view_name)
+    if limit is None:
+        raise ValueError(f'No query budget configured for {view_name!r}')
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise QueryBudgetExceeded(
+            f'{view_name or "Block"} ran {counter.count} queries, over its budget of {limit}'
+        )
+
+
+def resolve_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Counts each request's queries and DB time and leaves them on
+    request.db_queries, which MetricsMiddleware exports per URL name. In
+    DEBUG the numbers are also sent as X-DB-Queries/X-DB-Time-Ms headers,
+    and views that go over their QUERY_BUDGETS entry are logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as counter:
+            response = self.get_response(request)
+        
+        view_name = resolve_view_name(request)
+        request.db_queries = counter
+        
+        if settings.DEBUG:
+            response['X-View-Name'] = view_name
+            response['X-DB-Queries'] = str(counter.count)
+            response['X-DB-Time-Ms'] = f'{counter.duration * 1000:.1f}'
+            budget = get_query_budget(view_name)
+            if budget is not None and counter.count > budget:
+                logger.warning('%s ran %d queries, over its budget of %d', view_name, counter.count, budget)
+        return response
@@ -0,0 +1,188 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import resolve, reverse
+
+from events.instrumentation import count_queries, get_query_budget
+from events.models import Booking, Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every read-only view through the test client and report latency, queries and '
+        'memory per view. Views that change data (POST actions, the booking wizard) are not run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per view before timing')
+        parser.add_argument('--view', action='append', dest='views', help='Only run these URL names (repeatable)')
+        parser.add_argument('--admin', help='Username for admin views (default: first admin profile)')
+        parser.add_argument('--user', help='Username for user views (default: the user with the most bookings)')
+        parser.add_argument('--save', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Fail if results regress against this saved JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed median latency increase over --compare, as a fraction')
+
+    def handle(self, *args, **options):
+        active = User.objects.filter(is_active=True)
+        admin = self.get_user(options['admin'], active.filter(userprofile__role='admin').order_by('id'))
+        user = self.get_user(options['user'], active.filter(userprofile__role='user').annotate(
+            booking_count=Count('booking')
+        ).order_by('-booking_count', 'id'))
+        event = Event.objects.order_by('-date').first()
+        if event is None:
+            raise CommandError('No events found; run `manage.py seed_data` first.')
+        booking = Booking.objects.filter(user=user).order_by('-booking_date').first() if user else None
+
+        results = {}
+        for name, url, client in self.get_cases(admin, user, event, booking):
+            if options['views'] and name not in options['views']:
+                continue
+            if resolve(url.split('?')[0]).view_name != name.split('?')[0]:
+                self.stderr.write(f'Skipping {name}: {url} is served by another view')
+                continue
+            results[name] = self.measure(client, url, options['warmup'], options['repeat'])
+
+        self.report(results)
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results saved to {options["save"]}')
+
+        problems = self.check_budgets(results)
+        if options['compare']:
+            with open(options['compare']) as f:
+                problems += self.compare(results, json.load(f), options['tolerance'])
+        if problems:
+            for problem in problems:
+                self.stderr.write(self.style.ERROR(problem))
+            raise CommandError(f'{len(problems)} regression(s) found')
+        self.stdout.write(self.style.SUCCESS(f'Benchmarked {len(results)} views'))
+
+    def get_user(self, username, users):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User {username} does not exist.')
+        return users.first()
+
+    def client_for(self, user):
+        client = Client(raise_request_exception=False)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def get_cases(self, admin, user, event, booking):
+        anonymous = self.client_for(None)
+        search = event.title.split()[0]
+        cases = [
+            ('home', reverse('home'), anonymous),
+            ('home?search', f'{reverse("home")}?search={search}', anonymous),
+            ('event_detail', reverse('event_detail', args=[event.id]), anonymous),
+            ('login', reverse('login'), anonymous),
+            ('register', reverse('register'), anonymous),
+        ]
+        if user is not None:
+            client = self.client_for(user)
+            cases += [
+                ('my_bookings', reverse('my_bookings'), client),
+                ('booking_step1', reverse('booking_step1', args=[event.id]), client),
+            ]
+            if booking is not None:
+                cases.append(('booking_detail', reverse('booking_detail', args=[booking.id]), client))
+        if admin is not None:
+            client = self.client_for(admin)
+            cases += [
+                ('admin_dashboard', reverse('admin_dashboard'), client),
+                ('admin_events', reverse('admin_events'), client),
+                ('admin_event_create', reverse('admin_event_create'), client),
+                ('admin_event_edit', reverse('admin_event_edit', args=[event.id]), client),
+                ('admin_bookings', reverse('admin_bookings'), client),
+                ('admin_bookings?status', f'{reverse("admin_bookings")}?status=confirmed', client),
+                ('admin_users', reverse('admin_users'), client),
+                ('admin_services', reverse('admin_services'), client),
+                ('admin_photography_create', reverse('admin_photography_create'), client),
+                ('admin_catering_create', reverse('admin_catering_create'), client),
+            ]
+            if user is not None:
+                cases.append(('admin_user_bookings', reverse('admin_user_bookings', args=[user.id]), client))
+        return cases
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        response.close()
+        return response
+
+    def measure(self, client, url, warmup, repeat):
+        for _ in range(warmup):
+            self.request(client, url)
+
+        timings = []
+        for _ in range(repeat):
+            with count_queries() as queries:
+                start = time.perf_counter()
+                response = self.request(client, url)
+                timings.append(time.perf_counter() - start)
+
+        # Memory is measured on a separate request since tracing slows everything down
+        tracemalloc.start()
+        try:
+            self.request(client, url)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'url': url,
+            'status': response.status_code,
+            'median_ms': round(statistics.median(timings) * 1000, 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+            'max_ms': round(timings[-1] * 1000, 2),
+            'queries': queries.count,
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def report(self, results):
+        self.stdout.write(f'Database: {connection.vendor}')
+        header = f'{"view":<30} {"status":>6} {"median ms":>10} {"p95 ms":>9} {"max ms":>9} {"queries":>8} {"peak KB":>9}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<30} {result["status"]:>6} {result["median_ms"]:>10} {result["p95_ms"]:>9} '
+                f'{result["max_ms"]:>9} {result["queries"]:>8} {result["peak_kb"]:>9}'
+            )
+
+    def check_budgets(self, results):
+        problems = []
+        for name, result in results.items():
+            if result['status'] >= 400:
+                problems.append(f'{name}: returned HTTP {result["status"]}')
+            budget = get_query_budget(name.split('?')[0])
+            if budget is not None and result['queries'] > budget:
+                problems.append(f'{name}: {result["queries"]} queries, over its budget of {budget}')
+        return problems
+
+    def compare(self, results, baseline, tolerance):
+        problems = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result['queries'] > before['queries']:
+                problems.append(f'{name}: {result["queries"]} queries, was {before["queries"]}')
+            if result['median_ms'] > before['median_ms'] * (1 + tolerance):
+                problems.append(f'{name}: median {result["median_ms"]} ms, was {before["median_ms"]} ms')
+        return problems
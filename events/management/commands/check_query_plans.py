@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from events.queryplans import explain, hot_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot event and booking queries and fail if any of them scans a whole table '
+        'or sorts it instead of reading an index. Run it against realistic data (see seed_data): '
+        'on near-empty tables the planner may prefer a scan. The test suite runs the same checks.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('mysql', 'sqlite'):
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}.')
+
+        failures = 0
+        for query in hot_queries():
+            plan, problems = explain(query.queryset, query.allow_sort, query.seek)
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'FAIL {query.name}: {"; ".join(problems)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok   {query.name}'))
+            for line in plan:
+                self.stdout.write(f'       {line}')
+
+        if failures:
+            raise CommandError(f'{failures} quer{"y" if failures == 1 else "ies"} not served by an index')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from events.holds import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Expire unfinished booking holds and release their seats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of holds deleted per transaction')
+
+    def handle(self, *args, **options):
+        expired = release_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} booking holds'))
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from events.exports import booking_report_path, write_bookings_xlsx, write_report
+from events.models import Booking
+from events.bookings import filter_bookings
+
+
+class Command(BaseCommand):
+    help = 'Write the bookings Excel export offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=str, help='Only include bookings for this event id')
+        parser.add_argument('--status', type=str, help='Only include bookings with this status')
+        parser.add_argument('--date', type=str, help='Only include bookings made on this date (YYYY-MM-DD)')
+        parser.add_argument('--output', type=str, help='Write the export here instead of BOOKING_REPORTS_DIR')
+
+    def handle(self, *args, **options):
+        bookings, filters = filter_bookings(Booking.objects.all(), options)
+        report_path = Path(options['output']) if options['output'] else booking_report_path(filters, 'xlsx')
+        write_report(report_path, lambda output: write_bookings_xlsx(bookings, output))
+        self.stdout.write(self.style.SUCCESS(f'Bookings export written to {report_path}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from events.images import ensure_renditions
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Generate resized event image renditions for events that are missing or have outdated ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate renditions for every event image')
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        events = Event.objects.exclude(image='').exclude(image__isnull=True).only('id', 'title', 'image', 'image_renditions')
+        for event in events.iterator(chunk_size=200):
+            try:
+                changed = ensure_renditions(event, force=options['force'])
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f'Event {event.id} ({event.image.name}): {exc}'))
+                continue
+            generated += changed
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {generated} events ({failed} failed)'))
@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from events import reports
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily booking facts behind the admin reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        count = reports.rebuild_facts(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f'Reports rebuilt: {count} daily fact rows'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from events import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard rollup tables from the booking data'
+
+    def handle(self, *args, **options):
+        counters = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollups rebuilt: {counters[rollups.TOTAL_BOOKINGS]} bookings, '
+            f'{counters[rollups.TOTAL_EVENTS]} events, {counters[rollups.TOTAL_USERS]} users'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from events.models import Event
+from events.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the event search index for all events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Number of events loaded per query')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = 0
+        for event in Event.objects.only('id', 'title', 'description', 'location').iterator(chunk_size=options['chunk_size']):
+            backend.index_event(event)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} events using {backend.__class__.__name__}'))
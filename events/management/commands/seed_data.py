@@ -0,0 +1,270 @@
+import random
+import secrets
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from events import reports, rollups
+from events.catalog import invalidate_package_catalog
+from events.models import (
+    Booking, BookingService, CateringPackage, Event, EventCategory, PhotographyPackage, UserProfile,
+)
+from events.reservations import holds_seat, rebuild_inventory
+
+
+CATEGORY_NAMES = [
+    'Music', 'Technology', 'Business', 'Arts', 'Food & Drink', 'Sports', 'Education', 'Health',
+    'Film', 'Literature', 'Science', 'Fashion', 'Gaming', 'Travel', 'Photography', 'Comedy',
+]
+TITLE_ADJECTIVES = [
+    'Annual', 'Grand', 'Summer', 'Winter', 'Live', 'Global', 'Regional', 'Open', 'Weekend', 'Evening',
+    'Modern', 'Classic', 'Indie', 'Digital', 'Startup', 'Community',
+]
+TITLE_SUBJECTS = [
+    'Jazz', 'Python', 'Data', 'Design', 'Cloud', 'Poetry', 'Street Food', 'Yoga', 'Marathon', 'Cinema',
+    'Robotics', 'Photography', 'Rock', 'Classical', 'Marketing', 'Wellness', 'Chess', 'Craft Beer',
+]
+CITIES = [
+    'Mumbai', 'Pune', 'Bengaluru', 'Delhi', 'Hyderabad', 'Chennai', 'Kolkata', 'Ahmedabad', 'Jaipur', 'Goa',
+]
+VENUES = ['Arena', 'Hall', 'Convention Centre', 'Auditorium', 'Grounds', 'Club', 'Expo Centre']
+DESCRIPTION_WORDS = (
+    'join us for talks workshops live performances networking food music panel discussion keynote '
+    'hands on sessions speakers artists community exhibition showcase tickets include lunch'
+).split()
+
+# (value, relative weight)
+EVENT_TYPE_WEIGHTS = [
+    ('conference', 20), ('workshop', 25), ('seminar', 15), ('concert', 15),
+    ('festival', 8), ('exhibition', 10), ('other', 7),
+]
+STATUS_WEIGHTS = [('confirmed', 60), ('pending', 20), ('completed', 12), ('rejected', 8)]
+CAPACITY_CHOICES = [30, 50, 100, 200, 500, 1000, 5000]
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic categories, events, users, bookings and booking services for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--service-rate', type=float, default=0.3,
+                            help='Share of bookings that add each service (photography, catering)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for repeatable data')
+
+    def handle(self, *args, **options):
+        if options['bookings'] and not (options['events'] and options['users']):
+            raise CommandError('Bookings need at least one event and one user.')
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Usernames are unique per run so the command can be run repeatedly
+        self.tag = secrets.token_hex(3)
+        self.now = timezone.now()
+
+        categories = self.create_categories(options['categories'])
+        events = self.create_events(options['events'], categories)
+        users = self.create_users(options['users'])
+        photography, catering = self.create_packages()
+        booking_count, service_count = self.create_bookings(
+            options['bookings'], events, users, photography, catering, options['service_rate']
+        )
+
+        # bulk_create skips the post_save signals, so rebuild what they maintain
+        self.stdout.write('Rebuilding derived tables...')
+        rebuild_inventory(Event.objects.filter(id__in=[event.id for event in events]))
+        rollups.rebuild()
+        reports.rebuild_facts()
+        call_command('rebuild_search_index', stdout=self.stdout)
+        invalidate_package_catalog()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(categories)} categories, {len(events)} events, {len(users)} users, '
+            f'{booking_count} bookings and {service_count} booking services'
+        ))
+
+    def insert(self, model, objs):
+        """bulk_create that also fills in primary keys on databases (MySQL) that do not return them."""
+        if not objs:
+            return objs
+        last_id = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        if objs[0].pk is None:
+            # Rows from one bulk insert get consecutive ids in the order given
+            ids = model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)
+            for obj, pk in zip(objs, ids):
+                obj.pk = pk
+        return objs
+
+    def create_categories(self, count):
+        names = [
+            CATEGORY_NAMES[i % len(CATEGORY_NAMES)] + (f' {i // len(CATEGORY_NAMES) + 1}' if i >= len(CATEGORY_NAMES) else '')
+            for i in range(count)
+        ]
+        existing = {category.name: category for category in EventCategory.objects.filter(name__in=names)}
+        new = self.insert(EventCategory, [
+            EventCategory(name=name, description=f'{name} events') for name in names if name not in existing
+        ])
+        return list(existing.values()) + new
+
+    def create_events(self, count, categories):
+        event_types, type_weights = zip(*EVENT_TYPE_WEIGHTS)
+        today = self.now.date()
+        events = []
+        for i in range(count):
+            city = self.random.choice(CITIES)
+            events.append(Event(
+                title=f'{self.random.choice(TITLE_ADJECTIVES)} {self.random.choice(TITLE_SUBJECTS)} '
+                      f'{self.random.choice(["Meetup", "Summit", "Night", "Festival", "Workshop", "Expo"])}',
+                description=' '.join(self.random.choices(DESCRIPTION_WORDS, k=self.random.randint(20, 60))).capitalize() + '.',
+                category=self.random.choice(categories) if categories else None,
+                event_type=self.random.choices(event_types, type_weights)[0],
+                # About two thirds of the events are in the past
+                date=today + timedelta(days=self.random.randint(-365, 180)),
+                time=time(self.random.choice([9, 10, 11, 14, 16, 18, 19, 20])),
+                location=f'{city} {self.random.choice(VENUES)}',
+                organizer=f'{city} Events Co.',
+                price=Decimal(self.random.choice([0, 199, 299, 499, 999, 1499, 2999])),
+                capacity=self.random.choice(CAPACITY_CHOICES),
+            ))
+        return self.insert(Event, events)
+
+    def create_users(self, count):
+        # Hashing once keeps this fast; every seeded user's password is "password"
+        password = make_password('password')
+        users = self.insert(User, [
+            User(
+                username=f'seed_{self.tag}_{i}',
+                email=f'seed_{self.tag}_{i}@example.com',
+                first_name=self.random.choice(['Asha', 'Rahul', 'Priya', 'Vikram', 'Neha', 'Arjun', 'Meera', 'Karan']),
+                last_name=self.random.choice(['Sharma', 'Patel', 'Iyer', 'Khan', 'Das', 'Reddy', 'Singh', 'Joshi']),
+                password=password,
+                date_joined=self.now - timedelta(days=self.random.randint(0, 730)),
+            )
+            for i in range(count)
+        ])
+        self.insert(UserProfile, [
+            UserProfile(
+                user=user,
+                phone=f'9{self.random.randint(0, 999999999):09d}',
+                address=f'{self.random.randint(1, 500)} Main Road, {self.random.choice(CITIES)}',
+            )
+            for user in users
+        ])
+        return users
+
+    def create_packages(self):
+        photography = list(PhotographyPackage.objects.filter(is_active=True))
+        if not photography:
+            photography = self.insert(PhotographyPackage, [
+                PhotographyPackage(name=name, description=f'{name} photography', photo_count=photos,
+                                   price=Decimal(price), photographers_count=crew,
+                                   includes_editing=crew > 1, includes_album=crew > 2)
+                for name, photos, price, crew in [
+                    ('Basic', '50', 4999, 1), ('Standard', '150', 9999, 2), ('Premium', 'unlimited', 19999, 3),
+                ]
+            ])
+        catering = list(CateringPackage.objects.filter(is_active=True))
+        if not catering:
+            catering = self.insert(CateringPackage, [
+                CateringPackage(name=name, description=f'{name} menu', meal_type=meal,
+                                price_per_plate=Decimal(price), supports_nonveg=meal != 'breakfast')
+                for name, meal, price in [
+                    ('Morning', 'breakfast', 150), ('Classic', 'lunch', 350),
+                    ('Banquet', 'dinner', 650), ('Tea Time', 'snacks', 120),
+                ]
+            ])
+        return photography, catering
+
+    def create_bookings(self, count, events, users, photography, catering, service_rate):
+        statuses, status_weights = zip(*STATUS_WEIGHTS)
+        # A few events draw most of the bookings (roughly Zipf distributed)
+        popularity = self.random.sample(range(1, len(events) + 1), len(events))
+        event_weights = [1 / rank ** 0.8 for rank in popularity]
+        seats_left = {event.id: event.capacity for event in events}
+
+        booking_date = Booking._meta.get_field('booking_date')
+        # auto_now_add would stamp every row with the current time
+        booking_date.auto_now_add = False
+        booking_total = service_total = 0
+        try:
+            while booking_total < count:
+                size = min(self.batch_size, count - booking_total)
+                bookings, services = [], []
+                for event in self.random.choices(events, event_weights, k=size):
+                    status = self.random.choices(statuses, status_weights)[0]
+                    if holds_seat(status):
+                        # Sold out: try a few other events before turning the booking down
+                        for _ in range(5):
+                            if seats_left[event.id] > 0:
+                                break
+                            event = self.random.choice(events)
+                        if seats_left[event.id] > 0:
+                            seats_left[event.id] -= 1
+                        else:
+                            status = 'rejected'
+                    booking = Booking(
+                        user=self.random.choice(users),
+                        event=event,
+                        status=status,
+                        event_fee=event.price,
+                        total_amount=event.price,
+                        booking_date=self.booking_date_for(event),
+                        attendance_marked=status == 'completed' and self.random.random() < 0.8,
+                    )
+                    booking.seeded_services = self.services_for(booking, photography, catering, service_rate)
+                    booking.total_amount += sum(service.service_price for service in booking.seeded_services)
+                    bookings.append(booking)
+
+                with transaction.atomic():
+                    self.insert(Booking, bookings)
+                    for booking in bookings:
+                        for service in booking.seeded_services:
+                            service.booking = booking
+                            services.append(service)
+                    self.insert(BookingService, services)
+
+                booking_total += len(bookings)
+                service_total += len(services)
+                self.stdout.write(f'  {booking_total}/{count} bookings')
+        finally:
+            booking_date.auto_now_add = True
+        return booking_total, service_total
+
+    def booking_date_for(self, event):
+        starts_at = timezone.make_aware(datetime.combine(event.date, event.time))
+        latest = min(starts_at, self.now)
+        return latest - timedelta(seconds=self.random.randint(0, 90 * 24 * 3600))
+
+    def services_for(self, booking, photography, catering, rate):
+        services = []
+        if photography and self.random.random() < rate:
+            package = self.random.choice(photography)
+            services.append(BookingService(
+                service_type='photography',
+                photography_package=package,
+                photo_type=self.random.choice(PhotographyPackage.PHOTO_TYPES)[0],
+                duration=self.random.choice(PhotographyPackage.DURATION_CHOICES)[0],
+                delivery_method=self.random.choice(PhotographyPackage.DELIVERY_CHOICES)[0],
+                service_price=package.price,
+            ))
+        if catering and self.random.random() < rate:
+            package = self.random.choice(catering)
+            plates = self.random.choice([10, 25, 50, 100, 200])
+            services.append(BookingService(
+                service_type='catering',
+                catering_package=package,
+                food_type='nonveg' if package.supports_nonveg and self.random.random() < 0.4 else 'veg',
+                plate_count=plates,
+                service_price=package.price_per_plate * plates,
+            ))
+        return services
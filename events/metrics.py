@@ -0,0 +1,207 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from .instrumentation import resolve_view_name
+
+
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests served, by route, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Time spent serving a request, by route.'),
+    'http_request_db_duration_seconds': ('histogram', 'Time spent in database queries per request, by route.'),
+    'http_request_db_queries_total': ('counter', 'Database queries run, by route.'),
+}
+
+
+class MetricsStore:
+    """
+    Metrics for one worker process. Each worker keeps its samples in memory
+    and writes them to its own JSON file in METRICS_DIR every few seconds;
+    the /metrics view adds up the files of every worker, so the totals are
+    the same whichever gunicorn worker answers the scrape.
+
+    Files of workers that have exited are kept (their counts still belong in
+    the totals), so clear METRICS_DIR whenever the server is restarted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._path = None
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # A worker forked from a preloaded master must not inherit the
+        # master's samples or write to the master's file
+        if os.getpid() != self._pid:
+            self._lock = threading.Lock()
+            self._reset()
+
+    @property
+    def directory(self):
+        return Path(settings.METRICS_DIR)
+
+    @property
+    def path(self):
+        if self._path is None:
+            # The random suffix keeps a reused pid from overwriting the
+            # file of an earlier worker
+            self._path = self.directory / f'worker-{self._pid}-{uuid.uuid4().hex[:8]}.json'
+        return self._path
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                histogram[0][i] += 1
+                break
+        histogram[1] += value
+        histogram[2] += 1
+
+    def record_request(self, view, method, status, duration, db_time=None, db_queries=None):
+        self._check_fork()
+        with self._lock:
+            self.inc('http_requests_total', {'view': view, 'method': method, 'status': str(status)})
+            self.observe('http_request_duration_seconds', {'view': view}, duration)
+            if db_time is not None:
+                self.observe('http_request_db_duration_seconds', {'view': view}, db_time)
+                self.inc('http_request_db_queries_total', {'view': view}, db_queries)
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def _dump(self):
+        return {
+            'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+            'histograms': [[name, dict(labels), *histogram] for (name, labels), histogram in self._histograms.items()],
+        }
+
+    def flush(self):
+        self._check_fork()
+        with self._lock:
+            data = self._dump()
+            self._last_flush = time.monotonic()
+        if not data['counters'] and not data['histograms']:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a scrape never reads a half-written file
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def collect(self):
+        """Return (counters, histograms) summed over every worker's file."""
+        self.flush()
+        counters = {}
+        histograms = {}
+        if not self.directory.is_dir():
+            return counters, histograms
+        for path in self.directory.glob('worker-*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in data.get('counters', []):
+                key = (name, tuple(sorted(labels.items())))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total, count in data.get('histograms', []):
+                key = (name, tuple(sorted(labels.items())))
+                merged = histograms.setdefault(key, [[0] * len(DURATION_BUCKETS), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        return counters, histograms
+
+
+store = MetricsStore()
+atexit.register(lambda: store.flush())
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+def format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render_metrics():
+    """Render the aggregated metrics in the Prometheus text exposition format."""
+    counters, histograms = store.collect()
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'counter':
+            for (sample_name, labels), value in sorted(counters.items()):
+                if sample_name == name:
+                    lines.append(f'{name}{format_labels(labels)} {format_number(value)}')
+            continue
+        for (sample_name, labels), (buckets, total, count) in sorted(histograms.items()):
+            if sample_name != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_number(total)}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Times every request and records it under its URL name. Place it right
+    after WhiteNoise (so static files are not counted) and ahead of
+    QueryInstrumentationMiddleware, so the timing covers the rest of the
+    stack and the request's DB time is available once it returns.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+        
+        db_queries = getattr(request, 'db_queries', None)
+        store.record_request(
+            resolve_view_name(request),
+            request.method if request.method in HTTP_METHODS else 'other',
+            response.status_code,
+            duration,
+            db_time=db_queries.duration if db_queries else None,
+            db_queries=db_queries.count if db_queries else None,
+        )
+        return response
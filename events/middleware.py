@@ -4,11 +4,23 @@ from django.shortcuts import redirect
 from django.conf import settings
 
 
+def sessionless(view_func):
+    # Views marked with this (token-authenticated APIs) never load the session
+    view_func.sessionless = True
+    return view_func
+
+
 class SessionTimeoutMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
+        response = self.get_response(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'sessionless', False):
+            return None
         if request.user.is_authenticated:
             last_activity = request.session.get('last_activity')
             if last_activity:
@@ -16,8 +28,9 @@ class SessionTimeoutMiddleware:
                 if elapsed > settings.SESSION_COOKIE_AGE:
                     logout(request)
                     return redirect('login')
-            request.session['last_activity'] = timezone.now().timestamp()
-        
-        response = self.get_response(request)
-        return response
-
+            # Only persist activity once it has moved by the granularity, so a
+            # burst of requests does not rewrite the session every time
+            now = timezone.now().timestamp()
+            if not last_activity or now - last_activity >= settings.SESSION_ACTIVITY_GRANULARITY:
+                request.session['last_activity'] = now
+        return None
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        'CREATE FULLTEXT INDEX events_event_title_description_ft ON events_event (title, description)'
+    )
+    schema_editor.execute(
+        'CREATE FULLTEXT INDEX events_event_location_ft ON events_event (location)'
+    )
+
+
+def remove_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('DROP INDEX events_event_title_description_ft ON events_event')
+    schema_editor.execute('DROP INDEX events_event_location_ft ON events_event')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('field', models.CharField(choices=[('title', 'Title'), ('description', 'Description'), ('location', 'Location')], max_length=20)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='events.event')),
+            ],
+            options={
+                'unique_together': {('term', 'field', 'event')},
+            },
+        ),
+        migrations.RunPython(add_fulltext_indexes, remove_fulltext_indexes),
+    ]
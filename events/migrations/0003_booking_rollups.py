@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStat',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('booking_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventBookingStat',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='booking_stat', serialize=False, to='events.event')),
+                ('booking_count', models.IntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
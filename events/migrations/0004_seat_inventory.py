@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:28
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def create_seat_inventory(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    SeatInventory = apps.get_model('events', 'SeatInventory')
+    events = Event.objects.annotate(
+        seats_held=Count('booking', filter=~Q(booking__status='rejected'))
+    ).values_list('id', 'capacity', 'seats_held')
+    SeatInventory.objects.bulk_create([
+        SeatInventory(event_id=event_id, remaining=max(capacity - seats_held, 0))
+        for event_id, capacity, seats_held in events.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_booking_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatInventory',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seat_inventory', serialize=False, to='events.event')),
+                ('remaining', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_seat_inventory, migrations.RunPython.noop),
+    ]
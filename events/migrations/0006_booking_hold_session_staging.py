@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_booking_hold'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='bookinghold',
+            name='event_fee',
+        ),
+        migrations.RemoveField(
+            model_name='bookinghold',
+            name='notes',
+        ),
+        migrations.RemoveField(
+            model_name='bookinghold',
+            name='services',
+        ),
+        migrations.RemoveField(
+            model_name='bookinghold',
+            name='total_amount',
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
@@ -52,6 +54,8 @@ class Event(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     capacity = models.IntegerField(validators=[MinValueValidator(1)])
     image = models.ImageField(upload_to='events/', null=True, blank=True)
+    # Resized copies of image, see events.images
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     video = models.FileField(upload_to='events/videos/', null=True, blank=True)
     registration_enabled = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -59,6 +63,12 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Also serves the ('-date', '-id') keyset ordering: InnoDB appends the PK
+            models.Index(fields=['date'], name='event_date_idx'),
+            models.Index(fields=['event_type', 'date'], name='event_type_date_idx'),
+            models.Index(fields=['category', 'date'], name='event_category_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -144,6 +154,12 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-booking_date']
+        indexes = [
+            models.Index(fields=['booking_date'], name='booking_date_idx'),
+            models.Index(fields=['user', 'booking_date'], name='booking_user_date_idx'),
+            models.Index(fields=['status', 'booking_date'], name='booking_status_date_idx'),
+            models.Index(fields=['event', 'status', 'booking_date'], name='booking_event_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title} - {self.status}"
@@ -176,3 +192,112 @@ class BookingService(models.Model):
     def __str__(self):
         return f"{self.booking} - {self.service_type}"
 
+
+
+class EventSearchTerm(models.Model):
+    FIELD_CHOICES = [
+        ('title', 'Title'),
+        ('description', 'Description'),
+        ('location', 'Location'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=50)
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = [('term', 'field', 'event')]
+
+    def __str__(self):
+        return f"{self.term} ({self.field}) - {self.event_id}"
+
+
+class StatCounter(models.Model):
+    key = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class DailyBookingStat(models.Model):
+    date = models.DateField(primary_key=True)
+    booking_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} - {self.booking_count}"
+
+
+class EventBookingStat(models.Model):
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='booking_stat')
+    booking_count = models.IntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.booking_count}"
+
+
+class DailyBookingFact(models.Model):
+    """Bookings and their revenue per day, event and status; see events.reports."""
+    date = models.DateField()
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='booking_facts')
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    booking_count = models.IntegerField(default=0)
+    # Sum of total_amount, which includes the add-ons
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of the bookings' BookingService.service_price
+    service_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['date']
+        # Leads with date, so it also serves date range scans
+        unique_together = [('date', 'event', 'status')]
+
+    def __str__(self):
+        return f"{self.date} - {self.event_id} - {self.status}: {self.booking_count}"
+
+
+class SeatInventory(models.Model):
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='seat_inventory')
+    remaining = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.remaining} seats left"
+
+
+class BookingHold(models.Model):
+    """A seat held while a user completes the booking wizard; the wizard itself lives in the session."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.event.title} - held until {self.expires_at}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class VideoUpload(models.Model):
+    """A resumable, chunked event video upload; see events.videos."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # Storage name of the assembled file once every chunk has arrived
+    video = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.filename} - {self.received}/{self.size} bytes"
+
+    @property
+    def is_complete(self):
+        return bool(self.video)
@@ -0,0 +1,123 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .pagination import querystring_with
+
+
+VERSION_KEY = 'events:public-pages:version'
+PAGE_KEY = 'events:public-page:{version}:{digest}'
+
+
+def public_page(params=(), last_modified=None):
+    """
+    Mark a view whose anonymous responses PublicPageCacheMiddleware may
+    cache. ``params`` are the query parameters that change the page (all
+    others are ignored); ``last_modified(**view_kwargs)`` returns the
+    datetime for Last-Modified, by default the last event or category change.
+    """
+    def decorator(view_func):
+        view_func.public_page = {'params': tuple(params), 'last_modified': last_modified}
+        return view_func
+    return decorator
+
+
+def _cache():
+    return caches[getattr(settings, 'PUBLIC_PAGE_CACHE', 'default')]
+
+
+def get_version():
+    """Time of the last event or category change; part of every page key."""
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Unknown (first use or evicted): assume everything just changed
+        version = time.time()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_public_pages():
+    _cache().set(VERSION_KEY, time.time(), None)
+
+
+def page_key(version, request, params):
+    # The same parameters the page may echo back, e.g. in its pagination links
+    query = querystring_with(request, *params)
+    digest = hashlib.sha1(f'{request.path}?{query}'.encode()).hexdigest()
+    return PAGE_KEY.format(version=version, digest=digest)
+
+
+def is_anonymous(request):
+    # Decided from the cookies alone, before any session is loaded. Visitors
+    # with a session may be logged in; pending messages are per visitor.
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES and 'messages' not in request.COOKIES
+
+
+class PublicPageCacheMiddleware:
+    """
+    Serves views marked with @public_page to anonymous visitors from the
+    cache, ahead of the session, CSRF and auth middleware. Pages carry a
+    strong ETag and Last-Modified, so repeat visits and a front proxy get
+    304 Not Modified. Any event or category change invalidates every page.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PUBLIC_PAGE_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not is_anonymous(request):
+            return self.get_response(request)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+        options = getattr(match.func, 'public_page', None)
+        if options is None:
+            return self.get_response(request)
+
+        cache = _cache()
+        version = get_version()
+        key = page_key(version, request, options['params'])
+        entry = cache.get(key)
+        if entry is None:
+            response = self.get_response(request)
+            # Only plain pages that did not start a session or set a CSRF cookie
+            if response.status_code != 200 or response.cookies or response.streaming:
+                return response
+            if options['last_modified']:
+                modified = options['last_modified'](**match.kwargs)
+                modified = modified.timestamp() if modified else version
+            else:
+                modified = version
+            entry = {
+                'content': response.content,
+                # Includes what the inner middleware added, e.g. X-Frame-Options
+                'headers': dict(response.items()),
+                'etag': f'"{hashlib.sha1(response.content).hexdigest()}"',
+                'last_modified': int(modified),
+            }
+            cache.set(key, entry, settings.PUBLIC_PAGE_CACHE_TIMEOUT)
+        else:
+            # The metrics and query instrumentation label requests by route
+            request.resolver_match = match
+            response = HttpResponse(entry['content'], headers=entry['headers'])
+
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        patch_cache_control(response, public=True, max_age=settings.PUBLIC_PAGE_MAX_AGE)
+        # Logged-in visitors get a different page at the same URL
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(
+            request, etag=entry['etag'], last_modified=entry['last_modified'], response=response,
+        )
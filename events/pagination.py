@@ -0,0 +1,226 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(json.JSONEncoder):
+    # Keeps full microsecond precision, unlike DjangoJSONEncoder, so that
+    # equality comparisons on the ordering columns still match the row
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return super().default(o)
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'v': values, 'd': direction}, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return payload['v'], payload['d']
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def seek_filter(ordering, values, forward=True):
+    # (a, b, c) after (va, vb, vc) => a > va OR (a = va AND b > vb) OR ...
+    condition = Q()
+    equal = Q()
+    bound = None
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+        if bound is None:
+            # Redundant, but a plain range on the leading column lets the
+            # database seek into the index instead of walking it from the start
+            bound = Q(**{f'{name}__{lookup}e': value})
+    return bound & condition if bound is not None else condition
+
+
+def iter_keyset(queryset, ordering, chunk_size=2000):
+    """
+    Yields rows from a values() queryset in bounded chunks, seeking on the
+    ordering columns so memory stays flat on backends without server-side cursors.
+    """
+    queryset = queryset.order_by(*ordering)
+    names = [field.lstrip('-') for field in ordering]
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(seek_filter(ordering, last))
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = [rows[-1][name] for name in names]
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, ordering):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.ordering = ordering
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def _cursor_for(self, obj, direction):
+        # Rows of a values() queryset are dicts
+        get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+        return encode_cursor([get(field.lstrip('-')) for field in self.ordering], direction)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self._cursor_for(self.object_list[-1], 'n')
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self._cursor_for(self.object_list[0], 'p')
+        return None
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a unique ordering, e.g. ('-date', '-id').
+
+    Each page is fetched with a range condition on the ordering columns
+    instead of OFFSET, so deep pages cost the same as the first one.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def parse_cursor(self, cursor):
+        """
+        The (values, direction) of a cursor, each value converted by its
+        ordering field. Raises InvalidCursor for anything we did not issue.
+        """
+        values, direction = decode_cursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.ordering) or direction not in ('n', 'p'):
+            raise InvalidCursor(cursor)
+        try:
+            values = [self._field(field.lstrip('-')).to_python(value) for field, value in zip(self.ordering, values)]
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        # The ordering columns are never NULL, so neither is a real cursor
+        if any(value is None for value in values):
+            raise InvalidCursor(cursor)
+        return values, direction
+
+    def _field(self, name):
+        # Annotated orderings such as search_rank carry their own output field
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def get_page(self, cursor=None, strict=False):
+        """
+        The page after (or before) ``cursor``. A cursor that does not parse
+        gives the first page, or raises InvalidCursor when ``strict``.
+        """
+        values, direction = None, 'n'
+        if cursor:
+            try:
+                values, direction = self.parse_cursor(cursor)
+            except InvalidCursor:
+                if strict:
+                    raise
+
+        forward = direction != 'p'
+        queryset = self.queryset
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[self._reverse(field) for field in self.ordering])
+        if values is not None:
+            queryset = queryset.filter(seek_filter(self.ordering, values, forward))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            return KeysetPage(rows, has_more, values is not None, self.ordering)
+        rows.reverse()
+        return KeysetPage(rows, values is not None, has_more, self.ordering)
+
+    @staticmethod
+    def _reverse(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def approximate_count(self):
+        """
+        Returns (count, is_capped).
+
+        Unfiltered MySQL tables use the InnoDB row estimate; anything else is
+        counted up to PAGINATION_COUNT_LIMIT rows so the COUNT stays bounded.
+        """
+        queryset = self.queryset
+        if connection.vendor == 'mysql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                    'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0], False
+
+        limit = getattr(settings, 'PAGINATION_COUNT_LIMIT', 1000)
+        count = queryset.order_by()[:limit + 1].count()
+        return min(count, limit), count > limit
+
+
+def querystring_without(request, *keys):
+    params = request.GET.copy()
+    for key in keys:
+        params.pop(key, None)
+    return params.urlencode()
+
+
+def querystring_with(request, *keys):
+    # Only the named, non-blank parameters, in the order of ``keys``
+    return urlencode([(key, value) for key in keys for value in request.GET.getlist(key) if value.strip()])
@@ -0,0 +1,101 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from .bookings import filter_bookings
+from .models import Booking, Event, EventBookingStat
+from .pagination import seek_filter
+from .search import search_events
+
+
+# ``allow_sort``: the query has to sort its matches (e.g. by search rank),
+# so only a full scan counts as a problem. ``seek``: a later page, which
+# must start inside the index rather than walk it from the first row.
+HotQuery = namedtuple('HotQuery', ['name', 'queryset', 'allow_sort', 'seek'], defaults=[False, False])
+
+EVENTS_PAGE = ('-date', '-id')
+BOOKINGS_PAGE = ('-booking_date', '-id')
+
+
+def hot_queries():
+    """The queries behind home, my_bookings, admin_bookings and the dashboard, as the views build them."""
+    event = Event.objects.order_by().values('id', 'date', 'category_id', 'event_type').first() or {}
+    booking = Booking.objects.order_by().values('id', 'user_id', 'booking_date').first() or {}
+    now = timezone.now()
+    today = now.date()
+
+    def bookings(**params):
+        return filter_bookings(Booking.objects.select_related('user', 'event'), params)[0]
+
+    def events():
+        return Event.objects.select_related('category')
+
+    # Later pages seek past the last row of the previous one
+    events_after = seek_filter(EVENTS_PAGE, [event.get('date', today), event.get('id', 0)])
+    bookings_after = seek_filter(BOOKINGS_PAGE, [booking.get('booking_date', now), booking.get('id', 0)])
+
+    return [
+        HotQuery('home', events().order_by(*EVENTS_PAGE)[:13]),
+        HotQuery('home: page 2+', events().filter(events_after).order_by(*EVENTS_PAGE)[:13], seek=True),
+        HotQuery('home: upcoming', Event.objects.filter(date__gte=today).order_by(*EVENTS_PAGE)[:13]),
+        HotQuery('home: category', events().filter(category_id=event.get('category_id')).order_by(*EVENTS_PAGE)[:13]),
+        HotQuery('home: event type', events().filter(event_type=event.get('event_type', 'other')).order_by(*EVENTS_PAGE)[:13]),
+        HotQuery('home: search', search_events(events(), 'music').order_by('-search_rank', *EVENTS_PAGE)[:13], allow_sort=True),
+        HotQuery('my_bookings', Booking.objects.select_related('event').filter(user_id=booking.get('user_id', 0)).order_by('-booking_date')),
+        HotQuery('admin_bookings', bookings().order_by(*BOOKINGS_PAGE)[:21]),
+        HotQuery('admin_bookings: page 2+', bookings().filter(bookings_after).order_by(*BOOKINGS_PAGE)[:21], seek=True),
+        HotQuery('admin_bookings: status', bookings(status='confirmed').order_by(*BOOKINGS_PAGE)[:21]),
+        HotQuery('admin_bookings: event and status', bookings(event=event.get('id', 0), status='confirmed').order_by(*BOOKINGS_PAGE)[:21]),
+        HotQuery('admin_bookings: date', bookings(date=today.isoformat()).order_by(*BOOKINGS_PAGE)[:21]),
+        HotQuery('dashboard: booking date range', Booking.objects.filter(
+            booking_date__gte=now - timedelta(days=30)
+        ).order_by().values('status')),
+        HotQuery('dashboard: top events', EventBookingStat.objects.select_related('event').order_by('-booking_count')[:10]),
+        HotQuery('dashboard: upcoming events', Event.objects.filter(date__gte=today).order_by().values('id')),
+    ]
+
+
+def explain(queryset, allow_sort=False, seek=False):
+    """
+    EXPLAIN ``queryset`` on MySQL or SQLite. Returns the plan as lines and
+    a list of problems: full table or index scans, sorts an index should
+    have made unnecessary (unless ``allow_sort``) and, with ``seek``, a
+    first table read from the start of its index instead of a range.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = [row[3] for row in cursor.fetchall()]
+            problems = []
+            sorted_afterwards = any('TEMP B-TREE' in detail for detail in details)
+            for detail in details:
+                # "SCAN t USING INDEX i" walks an index in order, which is only
+                # worth it when that order is the one returned; a bare "SCAN t" reads the table
+                if detail.startswith('SCAN') and ('USING' not in detail or sorted_afterwards):
+                    problems.append(f'full scan ({detail})')
+                if 'TEMP B-TREE' in detail and not allow_sort:
+                    problems.append(f'sorts rows ({detail})')
+            if seek and details and details[0].startswith('SCAN'):
+                problems.append(f'walks the index from the start ({details[0]})')
+            return details, problems
+
+        cursor.execute(f'EXPLAIN {sql}', params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    plan = [
+        f'{row["table"]}: type={row["type"]} key={row["key"]} rows={row["rows"]} {row["Extra"] or ""}'.rstrip()
+        for row in rows
+    ]
+    problems = []
+    for row in rows:
+        # type=index reads the whole index; fine only when it also provides the order
+        if row['type'] == 'ALL' or (row['type'] == 'index' and 'filesort' in (row['Extra'] or '')):
+            problems.append(f'full scan of {row["table"]}')
+        if 'filesort' in (row['Extra'] or '') and not allow_sort:
+            problems.append(f'sorts {row["table"]}')
+    if seek and rows and rows[0]['type'] == 'index':
+        problems.append(f'walks the index of {rows[0]["table"]} from the start')
+    return plan, problems
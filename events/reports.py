@@ -0,0 +1,157 @@
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Booking, BookingService, DailyBookingFact
+
+
+# Report dimension -> (DailyBookingFact column or expression, extra label columns)
+DIMENSIONS = {
+    'day': ('date', ()),
+    'month': (TruncMonth('date'), ()),
+    'event': ('event_id', ('event__title',)),
+    'category': ('event__category__name', ()),
+    'status': ('status', ()),
+}
+
+_pending = threading.local()
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _aggregate(bookings, services):
+    """
+    Fact rows from a Booking and a matching BookingService queryset, keyed
+    by (date, event_id, status). Dates are local days, as TruncDate gives them.
+    """
+    facts = {}
+    for day, event_id, status, count, revenue in (
+        bookings.order_by().annotate(day=TruncDate('booking_date'))
+        .values_list('day', 'event_id', 'status').annotate(count=Count('id'), revenue=Sum('total_amount'))
+    ):
+        facts[day, event_id, status] = DailyBookingFact(
+            date=day, event_id=event_id, status=status,
+            booking_count=count, revenue=revenue or 0, service_revenue=Decimal('0'),
+        )
+    for day, event_id, status, service_revenue in (
+        services.order_by().annotate(day=TruncDate('booking__booking_date'))
+        .values_list('day', 'booking__event_id', 'booking__status').annotate(total=Sum('service_price'))
+    ):
+        if (day, event_id, status) in facts:
+            facts[day, event_id, status].service_revenue = service_revenue or 0
+    return facts
+
+
+def refresh_facts(day, event_id):
+    """Recount the facts of one event on one day from its bookings."""
+    start, end = _day_start(day), _day_start(day + timedelta(days=1))
+    bookings = Booking.objects.filter(event_id=event_id, booking_date__gte=start, booking_date__lt=end)
+    services = BookingService.objects.filter(
+        booking__event_id=event_id, booking__booking_date__gte=start, booking__booking_date__lt=end,
+    )
+    facts = _aggregate(bookings, services)
+    with transaction.atomic():
+        for fact in facts.values():
+            DailyBookingFact.objects.update_or_create(
+                date=day, event_id=event_id, status=fact.status,
+                defaults={
+                    'booking_count': fact.booking_count,
+                    'revenue': fact.revenue,
+                    'service_revenue': fact.service_revenue,
+                },
+            )
+        DailyBookingFact.objects.filter(date=day, event_id=event_id).exclude(
+            status__in=[status for _, _, status in facts]
+        ).delete()
+
+
+def _refresh_pending():
+    pending, _pending.keys = getattr(_pending, 'keys', set()), set()
+    for day, event_id in pending:
+        refresh_facts(day, event_id)
+
+
+def schedule_refresh(day, event_id):
+    """
+    Refresh the facts for a local day and event once the transaction
+    commits. Several changes to the same day and event are refreshed once
+    (keys left behind by a rolled back transaction are merely refreshed
+    along with the next one).
+    """
+    if not hasattr(_pending, 'keys'):
+        _pending.keys = set()
+    _pending.keys.add((day, event_id))
+    transaction.on_commit(_refresh_pending)
+
+
+@transaction.atomic
+def rebuild_facts(start=None, end=None):
+    """Recompute the facts for the local days start..end (every day when omitted); returns the row count."""
+    bookings = Booking.objects.all()
+    services = BookingService.objects.all()
+    facts = DailyBookingFact.objects.all()
+    if start:
+        bookings = bookings.filter(booking_date__gte=_day_start(start))
+        services = services.filter(booking__booking_date__gte=_day_start(start))
+        facts = facts.filter(date__gte=start)
+    if end:
+        bookings = bookings.filter(booking_date__lt=_day_start(end + timedelta(days=1)))
+        services = services.filter(booking__booking_date__lt=_day_start(end + timedelta(days=1)))
+        facts = facts.filter(date__lte=end)
+    facts.delete()
+    rows = list(_aggregate(bookings, services).values())
+    DailyBookingFact.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# Reports
+
+def _facts(start, end, statuses=None):
+    facts = DailyBookingFact.objects.filter(date__gte=start, date__lte=end)
+    if statuses:
+        facts = facts.filter(status__in=statuses)
+    return facts.order_by()
+
+
+def summary(start, end, statuses=None):
+    totals = _facts(start, end, statuses).aggregate(
+        bookings=Sum('booking_count'), revenue=Sum('revenue'), service_revenue=Sum('service_revenue'),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def breakdown(dimension, start, end, statuses=None, limit=None):
+    """
+    Bookings, revenue and add-on revenue for start..end grouped by
+    ``dimension`` (see DIMENSIONS), as dicts with a ``key`` and ``label``.
+    Time dimensions are in date order, the others by revenue.
+    """
+    column, labels = DIMENSIONS[dimension]
+    rows = (
+        _facts(start, end, statuses).annotate(key=F(column) if isinstance(column, str) else column)
+        .values('key', *labels)
+        .annotate(bookings=Sum('booking_count'), revenue=Sum('revenue'), service_revenue=Sum('service_revenue'))
+    )
+    rows = rows.order_by('key') if dimension in ('day', 'month') else rows.order_by('-revenue', 'key')
+    if limit:
+        rows = rows[:limit]
+    results = []
+    for row in rows:
+        label = row[labels[0]] if labels else row['key']
+        if dimension == 'month':
+            label = row['key'].strftime('%b %Y')
+        results.append({
+            'key': row['key'],
+            'label': label if label is not None else '—',
+            'bookings': row['bookings'],
+            'revenue': row['revenue'],
+            'service_revenue': row['service_revenue'],
+        })
+    return results
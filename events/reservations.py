@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Event, SeatInventory
+
+
+# Bookings in any other status hold a seat
+SEAT_RELEASING_STATUSES = ('rejected',)
+
+
+class SoldOut(Exception):
+    pass
+
+
+def holds_seat(status):
+    return status not in SEAT_RELEASING_STATUSES
+
+
+def reserve_seats(event_id, count=1):
+    # A conditional UPDATE never oversells and only locks the counter row for
+    # the rest of the (short) transaction, unlike counting existing bookings
+    updated = SeatInventory.objects.filter(event_id=event_id, remaining__gte=count).update(
+        remaining=F('remaining') - count
+    )
+    return updated == 1
+
+
+def release_seats(event_id, count=1):
+    SeatInventory.objects.filter(event_id=event_id).update(remaining=F('remaining') + count)
+
+
+def take_seats(event_id, count=1):
+    # Unconditional, for bookings made or restored by staff outside the booking flow
+    release_seats(event_id, -count)
+
+
+def create_inventory(event):
+    SeatInventory.objects.get_or_create(event=event, defaults={'remaining': event.capacity})
+
+
+def seats_remaining(event):
+    try:
+        return max(event.seat_inventory.remaining, 0)
+    except SeatInventory.DoesNotExist:
+        return event.capacity
+
+
+@transaction.atomic
+def rebuild_inventory(events=None):
+    """Recount remaining seats from the bookings, e.g. after a bulk import."""
+    events = Event.objects.all() if events is None else events
+    SeatInventory.objects.filter(event__in=events).delete()
+    counts = events.order_by().annotate(
+        seats_held=Count('booking', filter=~Q(booking__status__in=SEAT_RELEASING_STATUSES))
+    ).values_list('id', 'capacity', 'seats_held')
+    SeatInventory.objects.bulk_create([
+        SeatInventory(event_id=event_id, remaining=max(capacity - seats_held, 0))
+        for event_id, capacity, seats_held in counts.iterator()
+    ], batch_size=1000)
@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Booking, DailyBookingStat, Event, EventBookingStat, StatCounter
+
+
+TOTAL_EVENTS = 'events'
+TOTAL_USERS = 'users'
+TOTAL_BOOKINGS = 'bookings'
+
+
+def status_key(status):
+    return f'bookings.{status}'
+
+
+def _bump(model, lookup, field, delta):
+    if not delta:
+        return
+    updated = model.objects.filter(**lookup).update(**{field: F(field) + delta})
+    if updated or delta < 0:
+        # Nothing to create for decrements, e.g. when the event itself is being deleted
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{field: delta})
+    except IntegrityError:
+        # Another worker created the row first
+        model.objects.filter(**lookup).update(**{field: F(field) + delta})
+
+
+def bump_counter(key, delta=1):
+    _bump(StatCounter, {'key': key}, 'value', delta)
+
+
+def booking_added(booking, delta=1):
+    _bump(DailyBookingStat, {'date': timezone.localdate(booking.booking_date)}, 'booking_count', delta)
+    _bump(EventBookingStat, {'event_id': booking.event_id}, 'booking_count', delta)
+    bump_counter(TOTAL_BOOKINGS, delta)
+    bump_counter(status_key(booking.status), delta)
+
+
+def booking_status_changed(old_status, new_status, count=1):
+    if old_status == new_status:
+        return
+    bump_counter(status_key(old_status), -count)
+    bump_counter(status_key(new_status), count)
+
+
+def get_counters(*keys):
+    values = dict(StatCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    return {key: values.get(key, 0) for key in keys}
+
+
+def daily_booking_counts(start, end):
+    return list(DailyBookingStat.objects.filter(date__gte=start, date__lte=end).values_list('date', 'booking_count'))
+
+
+def top_events(limit=10):
+    """
+    The ``limit`` most booked events, each with a ``booking_count``. Read off
+    the EventBookingStat.booking_count index; events without a rollup row
+    (no bookings yet) only fill the list when there are fewer stat rows.
+    """
+    events = []
+    for stat in EventBookingStat.objects.select_related('event').order_by('-booking_count')[:limit]:
+        stat.event.booking_count = stat.booking_count
+        events.append(stat.event)
+    if len(events) < limit:
+        events += Event.objects.filter(booking_stat__isnull=True).annotate(booking_count=Value(0))[:limit - len(events)]
+    return events
+
+
+@transaction.atomic
+def rebuild():
+    StatCounter.objects.all().delete()
+    DailyBookingStat.objects.all().delete()
+    EventBookingStat.objects.all().delete()
+
+    counters = {
+        TOTAL_EVENTS: Event.objects.count(),
+        TOTAL_USERS: User.objects.count(),
+        TOTAL_BOOKINGS: Booking.objects.count(),
+    }
+    for status, count in Booking.objects.order_by().values_list('status').annotate(count=Count('id')):
+        counters[status_key(status)] = count
+    StatCounter.objects.bulk_create([StatCounter(key=key, value=value) for key, value in counters.items()])
+
+    daily = (
+        Booking.objects.order_by().annotate(day=TruncDate('booking_date'))
+        .values_list('day').annotate(count=Count('id'))
+    )
+    DailyBookingStat.objects.bulk_create(
+        [DailyBookingStat(date=day, booking_count=count) for day, count in daily], batch_size=1000
+    )
+
+    per_event = Booking.objects.order_by().values_list('event_id').annotate(count=Count('id'))
+    EventBookingStat.objects.bulk_create(
+        [EventBookingStat(event_id=event_id, booking_count=count) for event_id, count in per_event], batch_size=1000
+    )
+    return counters
@@ -0,0 +1,110 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .models import Event, EventSearchTerm
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 50
+
+# Relative weight of a term depending on where it appears in the event
+FIELD_WEIGHTS = {
+    'title': 3,
+    'description': 1,
+    'location': 1,
+}
+
+TEXT_FIELDS = ['title', 'description']
+
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall((text or '').lower())]
+
+
+class InvertedIndexBackend:
+    """Pure-Python inverted index stored in EventSearchTerm (works on any database)."""
+
+    def index_event(self, event):
+        rows = {}
+        for field, multiplier in FIELD_WEIGHTS.items():
+            for term in tokenize(getattr(event, field)):
+                key = (term, field)
+                rows[key] = rows.get(key, 0) + multiplier
+        EventSearchTerm.objects.filter(event=event).delete()
+        EventSearchTerm.objects.bulk_create([
+            EventSearchTerm(event=event, term=term, field=field, weight=weight)
+            for (term, field), weight in rows.items()
+        ])
+
+    def _term_filter(self, term, is_last):
+        # The last token is matched as a prefix so results update while typing.
+        # A range lookup keeps the (term, field, event) index usable on every backend.
+        if is_last:
+            return Q(term__gte=term, term__lt=term + '\uffff')
+        return Q(term=term)
+
+    def search(self, queryset, query, fields=TEXT_FIELDS):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+
+        matches = Q()
+        for position, term in enumerate(terms):
+            term_filter = self._term_filter(term, position == len(terms) - 1)
+            matches |= term_filter
+            # IN (subquery) starts from the term index rather than testing every event
+            queryset = queryset.filter(
+                pk__in=EventSearchTerm.objects.filter(term_filter, field__in=fields).values('event')
+            )
+
+        rank = EventSearchTerm.objects.filter(
+            matches, field__in=fields, event=OuterRef('pk')
+        ).order_by().values('event').annotate(total=Sum('weight')).values('total')
+        return queryset.annotate(
+            search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), 0)
+        ).order_by('-search_rank', '-date')
+
+
+class MySQLFullTextBackend:
+    """Uses the FULLTEXT indexes created by migration 0002 on MySQL."""
+
+    def index_event(self, event):
+        # MySQL maintains FULLTEXT indexes itself
+        pass
+
+    def search(self, queryset, query, fields=TEXT_FIELDS):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+
+        table = Event._meta.db_table
+        columns = ', '.join(f'{table}.{field}' for field in fields)
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        match = RawSQL(
+            f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)', [boolean_query], output_field=FloatField()
+        )
+        return queryset.annotate(search_rank=match).filter(search_rank__gt=0).order_by(
+            F('search_rank').desc(), '-date'
+        )
+
+
+def get_search_backend():
+    backend = getattr(settings, 'EVENT_SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'mysql' if connection.vendor == 'mysql' else 'index'
+    if backend == 'mysql':
+        return MySQLFullTextBackend()
+    return InvertedIndexBackend()
+
+
+def index_event(event):
+    get_search_backend().index_event(event)
+
+
+def search_events(queryset, query, fields=TEXT_FIELDS):
+    return get_search_backend().search(queryset, query, fields)
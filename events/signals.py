@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import reports, reservations, rollups
+from .catalog import invalidate_package_catalog
+from .pagecache import invalidate_public_pages
+from .models import Booking, BookingService, CateringPackage, Event, EventCategory, PhotographyPackage
+from .search import index_event
+
+
+@receiver(post_save, sender=Event)
+def update_event_search_index(sender, instance, **kwargs):
+    # Keeps the search index in sync for admin_event_create/admin_event_edit and the Django admin
+    index_event(instance)
+
+
+@receiver(post_save, sender=EventCategory)
+@receiver(pre_delete, sender=EventCategory)
+def touch_category_events(sender, instance, **kwargs):
+    # Event fragments show the category name and are keyed on updated_at
+    # (see events.fragments); pre_delete runs before SET_NULL detaches them
+    Event.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_init, sender=Event)
+def remember_event_capacity(sender, instance, **kwargs):
+    instance._original_capacity = instance.capacity
+
+
+@receiver(post_save, sender=Event)
+def update_seat_inventory(sender, instance, created, **kwargs):
+    if created:
+        reservations.create_inventory(instance)
+    elif instance.capacity != instance._original_capacity:
+        reservations.release_seats(instance.id, instance.capacity - instance._original_capacity)
+    instance._original_capacity = instance.capacity
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_status(sender, instance, **kwargs):
+    instance._original_status = instance.status
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_seats(sender, instance, created, **kwargs):
+    if created:
+        if reservations.holds_seat(instance.status) and not getattr(instance, '_seat_reserved', False):
+            reservations.take_seats(instance.event_id)
+        return
+    was_holding = reservations.holds_seat(instance._original_status)
+    if was_holding and not reservations.holds_seat(instance.status):
+        reservations.release_seats(instance.event_id)
+    elif not was_holding and reservations.holds_seat(instance.status):
+        reservations.take_seats(instance.event_id)
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_rollups(sender, instance, created, **kwargs):
+    # Rollups are applied after commit so their hot counter rows are never
+    # locked for the duration of a booking transaction
+    old_status, new_status = instance._original_status, instance.status
+    if created:
+        transaction.on_commit(lambda: rollups.booking_added(instance))
+    else:
+        transaction.on_commit(lambda: rollups.booking_status_changed(old_status, new_status))
+    instance._original_status = instance.status
+
+
+@receiver(post_delete, sender=Booking)
+def remove_booking(sender, instance, **kwargs):
+    instance.status = instance._original_status
+    if reservations.holds_seat(instance.status):
+        reservations.release_seats(instance.event_id)
+    transaction.on_commit(lambda: rollups.booking_added(instance, delta=-1))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def update_booking_facts(sender, instance, **kwargs):
+    reports.schedule_refresh(timezone.localdate(instance.booking_date), instance.event_id)
+
+
+@receiver(post_save, sender=BookingService)
+@receiver(post_delete, sender=BookingService)
+def update_service_facts(sender, instance, **kwargs):
+    # confirm_booking bulk-creates services in the booking's transaction, so
+    # they are counted by the booking's own refresh; this covers later edits
+    booking = Booking.objects.filter(id=instance.booking_id).values_list('booking_date', 'event_id').first()
+    if booking:
+        reports.schedule_refresh(timezone.localdate(booking[0]), booking[1])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=User)
+def count_created(sender, instance, created, **kwargs):
+    if created:
+        key = rollups.TOTAL_EVENTS if sender is Event else rollups.TOTAL_USERS
+        transaction.on_commit(lambda: rollups.bump_counter(key))
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=User)
+def count_deleted(sender, instance, **kwargs):
+    key = rollups.TOTAL_EVENTS if sender is Event else rollups.TOTAL_USERS
+    transaction.on_commit(lambda: rollups.bump_counter(key, -1))
+
+
+@receiver(post_save, sender=PhotographyPackage)
+@receiver(post_save, sender=CateringPackage)
+@receiver(post_delete, sender=PhotographyPackage)
+@receiver(post_delete, sender=CateringPackage)
+def bump_package_catalog(sender, **kwargs):
+    # Covers admin_photography_create, admin_catering_create and the Django admin
+    transaction.on_commit(invalidate_package_catalog)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=EventCategory)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=EventCategory)
+def bump_public_pages(sender, **kwargs):
+    transaction.on_commit(invalidate_public_pages)
+
+
+@receiver(user_logged_in)
+def start_session_activity(sender, request, user, **kwargs):
+    # Saved with the login itself, so SessionTimeoutMiddleware does not have
+    # to write the session again on the next request
+    request.session['last_activity'] = timezone.now().timestamp()
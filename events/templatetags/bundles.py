@@ -0,0 +1,24 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from events.storage import bundle_path
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    Tags for a STATIC_BUNDLES entry: the single collected bundle, or each
+    source file on its own when bundling is off (development).
+    """
+    if settings.STATIC_BUNDLES_ENABLED:
+        urls = [static(bundle_path(name))]
+    else:
+        urls = [static(source) for source in settings.STATIC_BUNDLES[name]]
+    if name.endswith('.css'):
+        return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in urls))
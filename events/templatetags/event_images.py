@@ -0,0 +1,35 @@
+from django import template
+from django.utils.html import format_html
+
+from events.images import get_rendition, srcset
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def event_picture(event, rendition, sizes='100vw', css_class='', loading='lazy'):
+    """
+    <picture> for event.image with WebP and JPEG srcsets of every rendition up
+    to ``rendition``. Falls back to the original upload until renditions have
+    been generated.
+
+        {% event_picture event 'card' sizes='(min-width: 992px) 33vw, 100vw' %}
+    """
+    if not event.image:
+        return ''
+    entry = get_rendition(event, rendition)
+    if entry is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}">',
+            event.image.url, event.title, css_class, loading,
+        )
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="{}" decoding="async">'
+        '</picture>',
+        srcset(event, 'webp', rendition), sizes,
+        event.image.storage.url(entry['jpeg']), srcset(event, 'jpeg', rendition), sizes,
+        entry['width'], entry['height'], event.title, css_class, loading,
+    )
@@ -0,0 +1,577 @@
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from .api import make_api_token
+from .checkin import make_checkin_token
+from .holds import active_holds
+from .instrumentation import query_budget
+from .models import (
+    Booking, BookingService, CateringPackage, Event, EventCategory, PhotographyPackage, UserProfile,
+)
+from .queryplans import explain, hot_queries
+from .reservations import reserve_seats
+from .throttling import LoginThrottle
+from .videos import UploadError, append_chunk, create_upload, parse_range
+
+
+def create_user(username, role='user'):
+    user = User.objects.create_user(username, password='password')
+    UserProfile.objects.create(user=user, role=role, phone='0000000000', address='Test address')
+    return user
+
+
+def create_event(title='Concert', capacity=50, day=None, **kwargs):
+    return Event.objects.create(
+        title=title, description='An evening of music', event_type='concert',
+        date=day or date.today(), time=time(18), location='City Hall',
+        organizer='Organizer', price=Decimal('100.00'), capacity=capacity, **kwargs,
+    )
+
+
+def create_booking(user, event, status='confirmed', **kwargs):
+    return Booking.objects.create(
+        user=user, event=event, status=status,
+        event_fee=Decimal('100.00'), total_amount=Decimal('100.00'), **kwargs,
+    )
+
+
+# Templates resolve static files without a collectstatic manifest
+PLAIN_STATIC_FILES = {
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    'STATIC_BUNDLES_ENABLED': False,
+}
+
+
+@override_settings(**PLAIN_STATIC_FILES)
+class QueryBudgetTests(TestCase):
+    """
+    Each page in settings.QUERY_BUDGETS stays within its budget. The data
+    has several rows per table, so a query per row (N+1) shows up as an
+    overrun.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('budget-admin', role='admin')
+        cls.user = create_user('budget-user')
+        other = create_user('budget-other')
+        category = EventCategory.objects.create(name='Music')
+        cls.events = [
+            Event.objects.create(
+                title=f'Concert {i}', description='An evening of music', category=category,
+                event_type='concert', date=date.today() + timedelta(days=i), time=time(18),
+                location='City Hall', organizer='Organizer', price=Decimal('100.00'), capacity=50,
+            )
+            for i in range(6)
+        ]
+        photography = PhotographyPackage.objects.create(
+            name='Basic', description='Photos', photo_count='50', price=Decimal('500.00'),
+        )
+        catering = CateringPackage.objects.create(
+            name='Lunch', description='Buffet', meal_type='lunch', price_per_plate=Decimal('10.00'),
+        )
+        for event in cls.events:
+            for user in (cls.user, other):
+                booking = Booking.objects.create(
+                    user=user, event=event, status='confirmed',
+                    event_fee=Decimal('100.00'), total_amount=Decimal('700.00'),
+                )
+                BookingService.objects.create(
+                    booking=booking, service_type='photography', photography_package=photography,
+                    service_price=Decimal('500.00'),
+                )
+                BookingService.objects.create(
+                    booking=booking, service_type='catering', catering_package=catering,
+                    plate_count=20, service_price=Decimal('200.00'),
+                )
+        cls.booking = Booking.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        # Measure the uncached path: fragment, catalog and page caches start empty
+        for cache in caches.all():
+            cache.clear()
+
+    def assertWithinBudget(self, view_name, url, user=None, **headers):
+        if user is not None:
+            self.client.force_login(user)
+        with query_budget(view_name):
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_home(self):
+        self.assertWithinBudget('home', reverse('home'), self.user)
+
+    def test_event_detail(self):
+        self.assertWithinBudget('event_detail', reverse('event_detail', args=[self.events[0].id]), self.user)
+
+    def test_booking_detail(self):
+        self.assertWithinBudget('booking_detail', reverse('booking_detail', args=[self.booking.id]), self.user)
+
+    def test_my_bookings(self):
+        self.assertWithinBudget('my_bookings', reverse('my_bookings'), self.user)
+
+    def test_admin_dashboard(self):
+        self.assertWithinBudget('admin_dashboard', reverse('admin_dashboard'), self.admin)
+
+    def test_admin_reports(self):
+        self.assertWithinBudget('admin_reports', reverse('admin_reports') + '?group=event', self.admin)
+
+    def test_admin_events(self):
+        self.assertWithinBudget('admin_events', reverse('admin_events'), self.admin)
+
+    def test_admin_bookings(self):
+        self.assertWithinBudget('admin_bookings', reverse('admin_bookings'), self.admin)
+
+    def test_admin_users(self):
+        self.assertWithinBudget('admin_users', reverse('admin_users'), self.admin)
+
+    def test_admin_user_bookings(self):
+        self.assertWithinBudget('admin_user_bookings', reverse('admin_user_bookings', args=[self.user.id]), self.admin)
+
+    def test_admin_services(self):
+        self.assertWithinBudget('admin_services', reverse('admin_services'), self.admin)
+
+    def test_api_events(self):
+        self.assertWithinBudget('api_events', reverse('api_events') + '?search=concert')
+
+    def test_api_event_detail(self):
+        self.assertWithinBudget('api_event_detail', reverse('api_event_detail', args=[self.events[0].id]))
+
+    def test_api_bookings(self):
+        self.assertWithinBudget(
+            'api_bookings', reverse('api_bookings'), HTTP_AUTHORIZATION=f'Bearer {make_api_token(self.user)}',
+        )
+
+
+
+@override_settings(CHECKIN_API_KEYS=['scanner-key'])
+class CheckInBatchTests(TestCase):
+    """Offline scans synced through api_checkin_batch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = create_user('checkin-user')
+        cls.event = create_event()
+        other_event = create_event('Other concert')
+        cls.confirmed = create_booking(user, cls.event)
+        cls.attended = create_booking(user, cls.event, attendance_marked=True)
+        cls.pending = create_booking(user, cls.event, status='pending')
+        cls.elsewhere = create_booking(user, other_event)
+        cls.deleted = create_booking(user, cls.event)
+        cls.deleted_token = make_checkin_token(cls.deleted)
+        cls.deleted.delete()
+
+    def sync(self, tokens, key='scanner-key'):
+        return self.client.post(
+            reverse('api_checkin_batch'), {'event': self.event.id, 'tokens': tokens},
+            content_type='application/json', HTTP_X_CHECKIN_KEY=key,
+        )
+
+    def test_batch_results(self):
+        token = make_checkin_token(self.confirmed)
+        tokens = [
+            token,
+            token,
+            make_checkin_token(self.attended),
+            make_checkin_token(self.pending),
+            make_checkin_token(self.elsewhere),
+            self.deleted_token,
+            'not-a-token',
+        ]
+        response = self.sync(tokens)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([result['token'] for result in data['results']], tokens)
+        self.assertEqual([result['result'] for result in data['results']], [
+            'checked_in', 'duplicate', 'already_checked_in', 'not_confirmed', 'wrong_event', 'not_found', 'invalid',
+        ])
+        self.assertEqual(data['checked_in'], 1)
+        self.confirmed.refresh_from_db()
+        self.assertTrue(self.confirmed.attendance_marked)
+
+        # Syncing the same scans again checks nobody in twice
+        results = self.sync(tokens[:1]).json()['results']
+        self.assertEqual(results[0]['result'], 'already_checked_in')
+
+    def test_requires_a_scanner_key(self):
+        self.assertEqual(self.sync([make_checkin_token(self.confirmed)], key='wrong').status_code, 403)
+        self.confirmed.refresh_from_db()
+        self.assertFalse(self.confirmed.attendance_marked)
+
+@skipUnless(connection.vendor in ('mysql', 'sqlite'), 'EXPLAIN output is only parsed for MySQL and SQLite')
+class QueryPlanTests(TestCase):
+    """The hot queries from events.queryplans are served by an index, as check_query_plans reports."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = create_user('plan-user')
+        category = EventCategory.objects.create(name='Music')
+        events = [
+            Event.objects.create(
+                title=f'Music night {i}', description='Live music', category=category,
+                event_type='concert', date=date.today() + timedelta(days=i % 20), time=time(18),
+                location='City Hall', organizer='Organizer', price=Decimal('100.00'), capacity=50,
+            )
+            for i in range(40)
+        ]
+        for event in events:
+            Booking.objects.create(
+                user=user, event=event, status='confirmed',
+                event_fee=Decimal('100.00'), total_amount=Decimal('100.00'),
+            )
+
+    def test_hot_queries_use_indexes(self):
+        for query in hot_queries():
+            with self.subTest(query.name):
+                plan, problems = explain(query.queryset, query.allow_sort, query.seek)
+                self.assertEqual(problems, [], '\n'.join(plan))
+
+
+class SeatInventoryTests(TestCase):
+    """The seat counter in events.reservations and the signals that keep it in step with bookings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('seat-user')
+
+    def remaining(self, event):
+        event.seat_inventory.refresh_from_db()
+        return event.seat_inventory.remaining
+
+    def test_reserve_fails_when_sold_out(self):
+        event = create_event(capacity=1)
+        self.assertTrue(reserve_seats(event.id))
+        self.assertEqual(self.remaining(event), 0)
+        self.assertFalse(reserve_seats(event.id))
+        self.assertEqual(self.remaining(event), 0)
+
+    def test_booking_takes_a_seat(self):
+        event = create_event(capacity=2)
+        create_booking(self.user, event)
+        self.assertEqual(self.remaining(event), 1)
+
+    def test_reserved_booking_is_not_counted_twice(self):
+        # The booking flow reserves the seat first, then saves the booking
+        event = create_event(capacity=2)
+        self.assertTrue(reserve_seats(event.id))
+        booking = Booking(
+            user=self.user, event=event, status='confirmed',
+            event_fee=Decimal('100.00'), total_amount=Decimal('100.00'),
+        )
+        booking._seat_reserved = True
+        booking.save()
+        self.assertEqual(self.remaining(event), 1)
+
+    def test_rejecting_releases_the_seat(self):
+        event = create_event(capacity=2)
+        booking = create_booking(self.user, event)
+        booking.status = 'rejected'
+        booking.save()
+        self.assertEqual(self.remaining(event), 2)
+        # Restoring a rejected booking takes the seat back
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertEqual(self.remaining(event), 1)
+
+    def test_deleting_releases_the_seat(self):
+        event = create_event(capacity=2)
+        create_booking(self.user, event).delete()
+        self.assertEqual(self.remaining(event), 2)
+
+    def test_deleting_a_rejected_booking_releases_nothing(self):
+        event = create_event(capacity=2)
+        create_booking(self.user, event, status='rejected').delete()
+        self.assertEqual(self.remaining(event), 2)
+
+    def test_capacity_edit_adjusts_remaining(self):
+        event = create_event(capacity=5)
+        create_booking(self.user, event)
+        event.capacity = 8
+        event.save()
+        self.assertEqual(self.remaining(event), 7)
+        event = Event.objects.get(id=event.id)
+        event.capacity = 3
+        event.save()
+        self.assertEqual(self.remaining(event), 2)
+
+
+@override_settings(MAX_LOGIN_ATTEMPTS=3, LOCKOUT_TIME=900, LOGIN_IP_MAX_ATTEMPTS=4, LOGIN_IP_WINDOW=100)
+class LoginThrottleTests(SimpleTestCase):
+    """
+    The cache counters behind the login lockout, used directly: the login
+    form's captcha keeps test POSTs from ever reaching them.
+    """
+
+    def setUp(self):
+        caches[settings.LOGIN_THROTTLE_CACHE].clear()
+
+    def throttle(self, username='alice', ip='10.0.0.1'):
+        return LoginThrottle(RequestFactory().post('/login/', REMOTE_ADDR=ip), username)
+
+    def at(self, timestamp):
+        # Only the throttle's clock moves; the cache still expires entries in real time
+        return mock.patch('events.throttling.time', mock.Mock(time=mock.Mock(return_value=timestamp)))
+
+    def test_locks_username_after_max_attempts(self):
+        throttle = self.throttle()
+        with self.at(1000):
+            self.assertEqual([throttle.record_failure() for _ in range(3)], [2, 1, 0])
+            self.assertIsNotNone(throttle.locked_until())
+            # Per username, not per client
+            self.assertIsNotNone(self.throttle(ip='10.0.0.2').locked_until())
+            self.assertIsNone(self.throttle('bob').locked_until())
+
+    def test_lock_expires(self):
+        throttle = self.throttle()
+        with self.at(1000):
+            for _ in range(3):
+                throttle.record_failure()
+        with self.at(1000 + 899):
+            self.assertIsNotNone(throttle.locked_until())
+        with self.at(1000 + 900):
+            self.assertIsNone(throttle.locked_until())
+
+    def test_reset_clears_failures(self):
+        throttle = self.throttle()
+        with self.at(1000):
+            throttle.record_failure()
+            throttle.record_failure()
+            throttle.reset()
+            self.assertEqual(throttle.record_failure(), 2)
+            self.assertIsNone(throttle.locked_until())
+
+    def test_ip_limit_slides_over_two_windows(self):
+        with self.at(1000):
+            for username in ('a', 'b', 'c', 'd'):
+                self.throttle(username).record_failure()
+            self.assertTrue(self.throttle('e').ip_blocked())
+            self.assertFalse(self.throttle('e', ip='10.0.0.2').ip_blocked())
+        # The previous window counts in full at the start of the next one...
+        with self.at(1100):
+            self.assertTrue(self.throttle('e').ip_blocked())
+        # ...half way through it counts for half
+        with self.at(1150):
+            self.assertFalse(self.throttle('e').ip_blocked())
+            for username in ('f', 'g'):
+                self.throttle(username).record_failure()
+            self.assertTrue(self.throttle('e').ip_blocked())
+        # Two windows later nothing is left
+        with self.at(1300):
+            self.assertFalse(self.throttle('e').ip_blocked())
+
+
+class VideoRangeTests(TestCase):
+    """Byte-range serving of event videos (events.videos.video_response)."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE='')
+        media.enable()
+        self.addCleanup(media.disable)
+        self.event = create_event()
+        self.event.video.save('clip.mp4', ContentFile(b'0123456789'))
+
+    def get(self, header):
+        response = self.client.get(reverse('event_video', args=[self.event.id]), HTTP_RANGE=header)
+        return response, b''.join(getattr(response, 'streaming_content', []))
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=2-5', 10), (2, 5))
+        self.assertEqual(parse_range('bytes=4-', 10), (4, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=-30', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=8-20', 10), (8, 9))
+        self.assertIsNone(parse_range(None, 10))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=10-', 10)
+
+    def test_suffix_range(self):
+        response, content = self.get('bytes=-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, b'6789')
+        self.assertEqual(response['Content-Range'], 'bytes 6-9/10')
+
+    def test_open_ended_range(self):
+        response, content = self.get('bytes=3-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, b'3456789')
+        self.assertEqual(response['Content-Length'], '7')
+
+    def test_start_past_the_end(self):
+        response, _ = self.get('bytes=10-12')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_multiple_ranges_send_the_whole_file(self):
+        response, content = self.get('bytes=0-1,4-5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, b'0123456789')
+
+
+class VideoUploadTests(TestCase):
+    """Chunks of a resumable upload (events.videos.append_chunk) are only accepted in order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('upload-admin', role='admin')
+
+    def setUp(self):
+        media_root, temp_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.addCleanup(shutil.rmtree, temp_dir)
+        directories = override_settings(MEDIA_ROOT=media_root, VIDEO_UPLOAD_TEMP_DIR=temp_dir)
+        directories.enable()
+        self.addCleanup(directories.disable)
+        self.upload = create_upload(self.user, 'clip.mp4', 10)
+
+    def append(self, content_range, data):
+        return append_chunk(self.upload.id, self.user, content_range, BytesIO(data))
+
+    def assertRejected(self, content_range, data, status=409):
+        with self.assertRaises(UploadError) as raised:
+            self.append(content_range, data)
+        self.assertEqual(raised.exception.status, status)
+
+    def test_chunks_in_order_assemble_the_video(self):
+        self.assertEqual(self.append('bytes 0-3/10', b'0123').received, 4)
+        upload = self.append('bytes 4-9/10', b'456789')
+        self.assertTrue(upload.is_complete)
+        with default_storage.open(upload.video) as video:
+            self.assertEqual(video.read(), b'0123456789')
+
+    def test_out_of_order_and_overlapping_chunks_are_rejected(self):
+        self.append('bytes 0-3/10', b'0123')
+        self.assertRejected('bytes 6-9/10', b'6789')
+        self.assertRejected('bytes 2-5/10', b'2345')
+        self.assertRejected('bytes 0-3/10', b'0123')
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.received, 4)
+        # The client resumes from the offset it was given
+        self.assertTrue(self.append('bytes 4-9/10', b'456789').is_complete)
+
+    def test_conflict_reports_the_offset(self):
+        self.append('bytes 0-3/10', b'0123')
+        self.client.force_login(self.user)
+        response = self.client.put(
+            reverse('admin_video_upload', args=[self.upload.id]), b'6789',
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE='bytes 6-9/10',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 4)
+
+    def test_range_outside_the_upload(self):
+        self.assertRejected('bytes 8-11/10', b'89ab', status=416)
+        self.assertRejected('bytes 0-3/12', b'0123', status=416)
+
+
+@override_settings(PUBLIC_PAGE_CACHE_ENABLED=True, **PLAIN_STATIC_FILES)
+class PublicPageCacheTests(TestCase):
+    """Anonymous home and event pages served by events.pagecache.PublicPageCacheMiddleware."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('page-user')
+        cls.event = create_event('Jazz night')
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_repeat_visit_is_served_from_the_cache(self):
+        first = self.client.get(reverse('home'))
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(first, 'Jazz night')
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('home'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_parameters_home_ignores_share_its_cache_entry(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            # page= is left over from the offset pagination home no longer uses
+            self.client.get(reverse('home') + '?page=2&utm_source=mail')
+
+    def test_event_detail_is_last_modified_with_the_event(self):
+        url = reverse('event_detail', args=[self.event.id])
+        response = self.client.get(url)
+        self.event.refresh_from_db()
+        self.assertEqual(response['Last-Modified'], http_date(int(self.event.updated_at.timestamp())))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_saving_an_event_invalidates_cached_pages(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.title = 'Blues night'
+            self.event.save()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Blues night')
+        self.assertNotContains(response, 'Jazz night')
+
+    def test_logged_in_visitors_bypass_the_cache(self):
+        self.client.get(reverse('home'))
+        # Changed without the signals, so the cached page goes stale
+        Event.objects.filter(id=self.event.id).update(title='Blues night', updated_at=timezone.now())
+        self.assertContains(self.client.get(reverse('home')), 'Jazz night')
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Blues night')
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(**PLAIN_STATIC_FILES)
+class BookingHoldTests(TestCase):
+    """Step 1 of the booking wizard holds one seat per user and event (events.holds)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('hold-user')
+        cls.event = create_event(capacity=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_resubmitting_step1_keeps_the_same_hold(self):
+        url = reverse('booking_step1', args=[self.event.id])
+        response = self.client.post(url, {'notes': 'Aisle seat'})
+        hold = active_holds(self.user, self.event).get()
+        self.assertRedirects(response, reverse('booking_step2', args=[hold.id]), fetch_redirect_response=False)
+        self.event.seat_inventory.refresh_from_db()
+        self.assertEqual(self.event.seat_inventory.remaining, 0)
+
+        # The event is sold out now, but not to the user holding its last seat
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Aisle seat')
+        response = self.client.post(url, {'notes': 'Front row'})
+        self.assertRedirects(response, reverse('booking_step2', args=[hold.id]), fetch_redirect_response=False)
+        self.assertEqual(active_holds(self.user, self.event).count(), 1)
+
+        self.client.force_login(create_user('hold-other'))
+        self.assertRedirects(self.client.get(url), reverse('event_detail', args=[self.event.id]), fetch_redirect_response=False)
@@ -0,0 +1,82 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_client_ip(request):
+    # Behind a reverse proxy REMOTE_ADDR is the proxy; CLIENT_IP_HEADER names
+    # the header it sets instead (e.g. HTTP_X_REAL_IP)
+    header = getattr(settings, 'CLIENT_IP_HEADER', '')
+    if header and request.META.get(header):
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _digest(value):
+    # Keeps arbitrary user input out of cache keys (memcached rejects spaces)
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+class LoginThrottle:
+    """
+    Failed-login counters kept in the cache, so checking and recording an
+    attempt never touches the database.
+
+    Each username is locked for LOCKOUT_TIME seconds after MAX_LOGIN_ATTEMPTS
+    failures. Each client IP may fail LOGIN_IP_MAX_ATTEMPTS times per
+    LOGIN_IP_WINDOW seconds, counted over a sliding window built from two
+    fixed windows so it refills gradually like a token bucket.
+    """
+
+    def __init__(self, request, username):
+        self.cache = caches[settings.LOGIN_THROTTLE_CACHE]
+        self.user_key = _digest(username)
+        self.ip_key = _digest(get_client_ip(request))
+
+    def _incr(self, key, timeout):
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def _ip_slot_keys(self, now):
+        slot = int(now // settings.LOGIN_IP_WINDOW)
+        return f'login:ip:{self.ip_key}:{slot}', f'login:ip:{self.ip_key}:{slot - 1}'
+
+    def locked_until(self):
+        """When the username's lockout ends, or None if it is not locked."""
+        timestamp = self.cache.get(f'login:lock:{self.user_key}')
+        if timestamp is None or timestamp <= time.time():
+            return None
+        return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+    def ip_blocked(self):
+        now = time.time()
+        current_key, previous_key = self._ip_slot_keys(now)
+        counts = self.cache.get_many([current_key, previous_key])
+        window = settings.LOGIN_IP_WINDOW
+        previous_weight = 1 - (now % window) / window
+        failures = counts.get(current_key, 0) + counts.get(previous_key, 0) * previous_weight
+        return failures >= settings.LOGIN_IP_MAX_ATTEMPTS
+
+    def record_failure(self):
+        """Count a failed attempt; returns the attempts left before the username is locked (0 once locked)."""
+        current_key, _ = self._ip_slot_keys(time.time())
+        self._incr(current_key, settings.LOGIN_IP_WINDOW * 2)
+
+        failures_key = f'login:failures:{self.user_key}'
+        failures = self._incr(failures_key, settings.LOCKOUT_TIME)
+        if failures >= settings.MAX_LOGIN_ATTEMPTS:
+            self.cache.set(f'login:lock:{self.user_key}', time.time() + settings.LOCKOUT_TIME, settings.LOCKOUT_TIME)
+            self.cache.delete(failures_key)
+            return 0
+        return settings.MAX_LOGIN_ATTEMPTS - failures
+
+    def reset(self):
+        self.cache.delete(f'login:failures:{self.user_key}')
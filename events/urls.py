@@ -5,24 +5,42 @@ urlpatterns = [
     # User side
     path('', views.home, name='home'),
     path('event/<int:event_id>/', views.event_detail, name='event_detail'),
+    path('event/<int:event_id>/video/', views.event_video, name='event_video'),
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
     path('booking/<int:event_id>/step1/', views.booking_step1, name='booking_step1'),
-    path('booking/<int:booking_id>/step2/', views.booking_step2, name='booking_step2'),
-    path('booking/<int:booking_id>/step3/', views.booking_step3, name='booking_step3'),
-    path('booking/<int:booking_id>/confirm/', views.booking_confirm, name='booking_confirm'),
+    path('booking/hold/<int:hold_id>/step2/', views.booking_step2, name='booking_step2'),
+    path('booking/hold/<int:hold_id>/step3/', views.booking_step3, name='booking_step3'),
+    path('booking/hold/<int:hold_id>/confirm/', views.booking_confirm, name='booking_confirm'),
+    path('booking/<int:booking_id>/', views.booking_detail, name='booking_detail'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('my-bookings/<int:booking_id>/ticket.svg', views.booking_ticket_qr, name='booking_ticket_qr'),
+    
+    # Check-in API
+    path('api/checkin/', views.api_checkin, name='api_checkin'),
+    path('api/checkin/batch/', views.api_checkin_batch, name='api_checkin_batch'),
+    
+    # Read API
+    path('api/auth/token/', views.api_token, name='api_token'),
+    path('api/events/', views.api_events, name='api_events'),
+    path('api/events/<int:event_id>/', views.api_event_detail, name='api_event_detail'),
+    path('api/bookings/', views.api_bookings, name='api_bookings'),
     
     # Admin side
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin/reports/', views.admin_reports, name='admin_reports'),
     path('admin/events/', views.admin_events, name='admin_events'),
     path('admin/events/create/', views.admin_event_create, name='admin_event_create'),
     path('admin/events/<int:event_id>/edit/', views.admin_event_edit, name='admin_event_edit'),
     path('admin/events/<int:event_id>/delete/', views.admin_event_delete, name='admin_event_delete'),
+    path('admin/videos/uploads/', views.admin_video_upload_create, name='admin_video_upload_create'),
+    path('admin/videos/uploads/<uuid:upload_id>/', views.admin_video_upload, name='admin_video_upload'),
     path('admin/bookings/', views.admin_bookings, name='admin_bookings'),
     path('admin/bookings/<int:booking_id>/update-status/', views.admin_booking_update_status, name='admin_booking_update_status'),
     path('admin/bookings/<int:booking_id>/mark-attendance/', views.admin_booking_mark_attendance, name='admin_booking_mark_attendance'),
+    path('admin/bookings/bulk/status/', views.admin_booking_bulk_status, name='admin_booking_bulk_status'),
+    path('admin/bookings/bulk/attendance/', views.admin_booking_bulk_attendance, name='admin_booking_bulk_attendance'),
     path('admin/bookings/export/excel/', views.admin_booking_export_excel, name='admin_booking_export_excel'),
     path('admin/bookings/export/pdf/', views.admin_booking_export_pdf, name='admin_booking_export_pdf'),
     path('admin/users/', views.admin_users, name='admin_users'),
@@ -31,5 +49,8 @@ urlpatterns = [
     path('admin/services/', views.admin_services, name='admin_services'),
     path('admin/services/photography/create/', views.admin_photography_create, name='admin_photography_create'),
     path('admin/services/catering/create/', views.admin_catering_create, name='admin_catering_create'),
+    
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
 ]
 
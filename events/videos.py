@@ -0,0 +1,220 @@
+import mimetypes
+import os
+import re
+import shutil
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Event, VideoUpload
+
+
+COPY_BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    """A chunk or upload the client has to correct; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Chunked uploads
+
+def part_path(upload):
+    return Path(settings.VIDEO_UPLOAD_TEMP_DIR) / f'{upload.id}.part'
+
+
+def delete_stale_uploads():
+    """Drop uploads nobody has touched for VIDEO_UPLOAD_EXPIRY seconds, with their files."""
+    cutoff = timezone.now() - timedelta(seconds=settings.VIDEO_UPLOAD_EXPIRY)
+    for upload in VideoUpload.objects.filter(updated_at__lt=cutoff):
+        part_path(upload).unlink(missing_ok=True)
+        for chunk in Path(settings.VIDEO_UPLOAD_TEMP_DIR).glob(f'{upload.id}.*.chunk'):
+            # Left behind by a worker that died while receiving a chunk
+            chunk.unlink(missing_ok=True)
+        if upload.video:
+            # Assembled but never attached to an event
+            default_storage.delete(upload.video)
+        upload.delete()
+
+
+def create_upload(user, filename, size):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in settings.VIDEO_UPLOAD_EXTENSIONS:
+        raise UploadError(f'Unsupported video type "{extension}".')
+    if size <= 0 or size > settings.VIDEO_UPLOAD_MAX_SIZE:
+        raise UploadError(f'Videos must be smaller than {settings.VIDEO_UPLOAD_MAX_SIZE // (1024 * 1024)} MB.')
+
+    delete_stale_uploads()
+    Path(settings.VIDEO_UPLOAD_TEMP_DIR).mkdir(parents=True, exist_ok=True)
+    upload = VideoUpload.objects.create(user=user, filename=os.path.basename(filename)[:255], size=size)
+    part_path(upload).touch()
+    return upload
+
+
+def parse_content_range(header, size):
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range header must look like "bytes start-end/total".')
+    start, end, total = (int(value) for value in match.groups())
+    if total != size or start > end or end >= size:
+        raise UploadError('Content-Range does not fit this upload.', status=416)
+    if end - start + 1 > settings.VIDEO_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError('Chunk too large.', status=413)
+    return start, end
+
+
+def append_chunk(upload_id, user, content_range, stream):
+    """
+    Append one chunk, read from ``stream``, to the upload. Chunks must arrive
+    in order: one that does not start at the current offset is refused with
+    409 and the client resumes from the offset it gets back.
+    """
+    upload = VideoUpload.objects.filter(id=upload_id, user=user).first()
+    if upload is None:
+        raise UploadError('Upload not found.', status=404)
+    if upload.is_complete:
+        return upload
+    start, end = parse_content_range(content_range, upload.size)
+    if start != upload.received:
+        raise UploadError(f'Expected a chunk starting at byte {upload.received}.', status=409)
+
+    # Receive the chunk into its own file first, so a slow client holds no lock
+    length = end - start + 1
+    chunk_path = part_path(upload).with_name(f'{upload.id}.{uuid.uuid4().hex}.chunk')
+    try:
+        with open(chunk_path, 'wb') as chunk:
+            remaining = length
+            while remaining:
+                block = stream.read(min(COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                chunk.write(block)
+                remaining -= len(block)
+        if remaining:
+            raise UploadError('Chunk ended early; resume from the last offset.')
+
+        with transaction.atomic():
+            # The row lock serializes appends to the same upload
+            upload = VideoUpload.objects.select_for_update().filter(id=upload_id, user=user).first()
+            if upload is None:
+                raise UploadError('Upload not found.', status=404)
+            if upload.is_complete:
+                return upload
+            if start != upload.received:
+                raise UploadError(f'Expected a chunk starting at byte {upload.received}.', status=409)
+            with open(part_path(upload), 'r+b') as part, open(chunk_path, 'rb') as chunk:
+                # Drop whatever an interrupted earlier append left past the offset
+                part.truncate(upload.received)
+                part.seek(upload.received)
+                shutil.copyfileobj(chunk, part, COPY_BLOCK_SIZE)
+
+            upload.received += length
+            if upload.received == upload.size:
+                upload.video = assemble(upload)
+            upload.save(update_fields=['received', 'video', 'updated_at'])
+    finally:
+        chunk_path.unlink(missing_ok=True)
+    return upload
+
+
+def assemble(upload):
+    """Move the finished temp file into media storage; returns its storage name."""
+    name = default_storage.get_available_name(Event._meta.get_field('video').generate_filename(None, upload.filename))
+    source = part_path(upload)
+    if isinstance(default_storage, FileSystemStorage):
+        # A rename when the temp dir is on the same filesystem, instead of a copy
+        destination = Path(default_storage.path(name))
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(source, destination)
+        if settings.FILE_UPLOAD_PERMISSIONS is not None:
+            os.chmod(destination, settings.FILE_UPLOAD_PERMISSIONS)
+        return name
+    with open(source, 'rb') as f:
+        name = default_storage.save(name, File(f))
+    source.unlink()
+    return name
+
+
+# Serving
+
+def parse_range(header, size):
+    """(start, end) for a single satisfiable byte range, None to send the whole file, or raise ValueError."""
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # "bytes=-500" is the last 500 bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def iter_file_range(f, start, length):
+    try:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(COPY_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        f.close()
+
+
+def video_response(request, field):
+    """
+    Serve a stored video with byte-range support. With MEDIA_SENDFILE set the
+    web server sends the file (and handles Range itself) via X-Accel-Redirect
+    or X-Sendfile, so no worker spends time streaming it.
+    """
+    content_type = mimetypes.guess_type(field.name)[0] or 'application/octet-stream'
+    if settings.MEDIA_SENDFILE == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        # nginx decodes the URI, so names with spaces or non-ASCII characters must be quoted
+        response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX + quote(field.name)
+        return response
+    if settings.MEDIA_SENDFILE == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = field.path
+        return response
+
+    size = field.size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        iter_file_range(field.storage.open(field.name, 'rb'), start, length),
+        status=206 if byte_range else 200,
+        content_type=content_type,
+    )
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -3,68 +3,82 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q, Count, Sum
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, FileResponse, Http404
+from django.template.defaultfilters import pluralize
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import urlencode
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_http_methods, require_safe
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from django.utils import timezone
-from django.core.paginator import Paginator
 from django.utils.safestring import mark_safe
-from datetime import datetime, timedelta
+from datetime import timedelta
 import json
-from openpyxl import Workbook
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
 from .models import (
     Event, Booking, BookingService, PhotographyPackage, CateringPackage,
-    UserProfile, EventCategory
+    UserProfile, EventCategory, BookingHold, VideoUpload
 )
+from . import api, reports, rollups
+from .api import APIError, api_response, get_api_user, make_api_token
+from .pagination import KeysetPaginator, querystring_with, querystring_without
+from .reservations import SoldOut, seats_remaining
+from .holds import (
+    HoldExpired, active_holds, confirm_booking, create_hold, expire_hold, get_staged_booking,
+    release_expired_holds, serialize_service, stage_booking, unstage_booking
+)
+from .catalog import get_package_catalog
+from .fragments import render_event_fragment, render_event_fragments
+from .pagecache import public_page
+from .checkin import check_in, check_in_batch, checkin_qr_svg, make_checkin_token
+from .middleware import sessionless
+from .metrics import render_metrics
+from .throttling import LoginThrottle
+from .backends import get_role
+from .videos import UploadError, append_chunk, create_upload, video_response
+from .bookings import filter_bookings
+from .bulk import bulk_mark_attendance, bulk_update_status
+from .exports import ReportQueueFull, booking_report_path, is_report_fresh, start_booking_report
 from .forms import (
     UserRegistrationForm, LoginForm, EventSearchForm, BookingForm,
     PhotographyServiceForm, CateringServiceForm, EventForm,
-    PhotographyPackageForm, CateringPackageForm
+    PhotographyPackageForm, CateringPackageForm, ReportForm, BookingFilterForm
 )
 import json
 
 
 def is_admin(user):
-    try:
-        return user.userprofile.role == 'admin'
-    except:
-        return False
+    return get_role(user) == 'admin'
 
 
 def is_staff_or_admin(user):
-    try:
-        return user.userprofile.role in ['admin', 'staff']
-    except:
-        return False
+    return get_role(user) in ['admin', 'staff']
 
 
 # User Side Views
+
+# The only query parameters home reads; the page cache keys on these alone
+HOME_FILTERS = ('search', 'category', 'event_type', 'location')
+
+
+@public_page(params=HOME_FILTERS + ('cursor',))
 def home(request):
     # Show all events on home page (filter can be applied via search)
-    events = Event.objects.all()
+    events = Event.objects.select_related('category')
     form = EventSearchForm(request.GET)
+    ordering = ('-date', '-id')
     
     if form.is_valid():
-        search = form.cleaned_data.get('search')
-        category = form.cleaned_data.get('category')
-        event_type = form.cleaned_data.get('event_type')
-        location = form.cleaned_data.get('location')
-        
-        if search:
-            events = events.filter(Q(title__icontains=search) | Q(description__icontains=search))
-        if category:
-            events = events.filter(category=category)
-        if event_type:
-            events = events.filter(event_type=event_type)
-        if location:
-            events = events.filter(location__icontains=location)
-    
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        events = form.filter_queryset(events)
+        if form.cleaned_data.get('search'):
+            ordering = ('-search_rank',) + ordering
+    
+    paginator = KeysetPaginator(events, 12, ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    cards = render_event_fragments('events/fragments/event_card.html', page_obj.object_list, request.user)
+    for event in page_obj:
+        event.card_html = cards[event.id]
     
     categories = EventCategory.objects.all()
     
@@ -73,19 +87,42 @@ def home(request):
         'form': form,
         'categories': categories,
         'request': request,
+        'filter_query': querystring_with(request, *HOME_FILTERS),
     })
 
 
+def event_last_modified(event_id):
+    return Event.objects.filter(id=event_id).values_list('updated_at', flat=True).first()
+
+
+@public_page(last_modified=event_last_modified)
 def event_detail(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
+    event = get_object_or_404(Event.objects.select_related('seat_inventory'), id=event_id)
     # Preserve next parameter if exists for redirect after login/register
     next_url = request.GET.get('next', None)
+    remaining = seats_remaining(event)
+    # Guests are not shown the seat count, so it stays out of their cache key
+    event_html = render_event_fragment(
+        'events/fragments/event_detail.html', event, request.user,
+        seats_remaining=remaining if request.user.is_authenticated else None,
+    )
     return render(request, 'events/event_detail.html', {
         'event': event,
+        'event_html': event_html,
         'next_url': next_url,
+        'seats_remaining': remaining,
     })
 
 
+@sessionless
+def event_video(request, event_id):
+    # Players fetch videos in many Range requests; see events.videos
+    event = get_object_or_404(Event.objects.only('id', 'video'), id=event_id)
+    if not event.video:
+        raise Http404
+    return video_response(request, event.video)
+
+
 def register(request):
     if request.user.is_authenticated:
         return redirect('home')
@@ -123,35 +160,31 @@ def user_login(request):
             username = form.cleaned_data['username']
             password = form.cleaned_data['password']
             
-            try:
-                user = User.objects.get(username=username)
-                profile = user.userprofile
-                
-                # Check if account is locked
-                if profile.locked_until and profile.locked_until > timezone.now():
-                    messages.error(request, f'Account is locked. Try again after {profile.locked_until.strftime("%H:%M:%S")}')
-                    return render(request, 'events/login.html', {'form': form, 'next_url': next_url})
-                
-                user = authenticate(request, username=username, password=password)
-                if user:
-                    profile.failed_login_attempts = 0
-                    profile.locked_until = None
-                    profile.save()
-                    login(request, user)
-                    # Redirect to next URL (booking page or event detail)
-                    if next_url and next_url != 'home':
-                        return redirect(next_url)
-                    return redirect('home')
-                else:
-                    profile.failed_login_attempts += 1
-                    if profile.failed_login_attempts >= 3:
-                        profile.locked_until = timezone.now() + timedelta(minutes=5)
-                        messages.error(request, 'Account locked for 5 minutes due to multiple failed attempts.')
-                    else:
-                        messages.error(request, f'Invalid credentials. {3 - profile.failed_login_attempts} attempts remaining.')
-                    profile.save()
-            except User.DoesNotExist:
-                messages.error(request, 'Invalid credentials.')
+            # Throttling is checked first so locked-out attempts never reach the
+            # database or the password hasher
+            throttle = LoginThrottle(request, username)
+            locked_until = throttle.locked_until()
+            if locked_until:
+                messages.error(request, f'Account is locked. Try again after {timezone.localtime(locked_until).strftime("%H:%M:%S")}')
+                return render(request, 'events/login.html', {'form': form, 'next_url': next_url})
+            if throttle.ip_blocked():
+                messages.error(request, 'Too many failed login attempts from your network. Please try again later.')
+                return render(request, 'events/login.html', {'form': form, 'next_url': next_url})
+            
+            user = authenticate(request, username=username, password=password)
+            if user:
+                throttle.reset()
+                login(request, user)
+                # Redirect to next URL (booking page or event detail)
+                if next_url and next_url != 'home':
+                    return redirect(next_url)
+                return redirect('home')
+            
+            remaining = throttle.record_failure()
+            if remaining == 0:
+                messages.error(request, f'Account locked for {settings.LOCKOUT_TIME // 60} minutes due to multiple failed attempts.')
+            else:
+                messages.error(request, f'Invalid credentials. {remaining} attempt{pluralize(remaining)} remaining.')
     else:
         form = LoginForm()
     
@@ -166,88 +199,102 @@ def user_logout(request):
 
 @login_required
 def booking_step1(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
+    event = get_object_or_404(Event.objects.select_related('seat_inventory'), id=event_id)
     
     if not event.registration_enabled:
         messages.error(request, 'Registration for this event is currently disabled.')
         return redirect('event_detail', event_id=event_id)
     
+    # A user who already holds a seat goes back to it even if the event has
+    # sold out since; create_hold() renews that hold instead of taking another
+    hold = active_holds(request.user, event).first()
+    if hold is None and seats_remaining(event) <= 0 and not release_expired_holds(BookingHold.objects.filter(event=event)):
+        messages.error(request, 'Sorry, this event is sold out.')
+        return redirect('event_detail', event_id=event_id)
+    
     if request.method == 'POST':
         form = BookingForm(request.POST)
         if form.is_valid():
-            booking = Booking.objects.create(
-                user=request.user,
-                event=event,
-                event_fee=event.price,
-                total_amount=event.price,
-                notes=form.cleaned_data['notes']
-            )
-            return redirect('booking_step2', booking_id=booking.id)
+            try:
+                hold = create_hold(request.user, event)
+            except SoldOut:
+                messages.error(request, 'Sorry, this event sold out while you were booking.')
+                return redirect('event_detail', event_id=event_id)
+            stage_booking(request.session, hold, event_fee=str(event.price), notes=form.cleaned_data['notes'], services=[])
+            return redirect('booking_step2', hold_id=hold.id)
     else:
-        form = BookingForm()
+        staged = get_staged_booking(request.session, hold) if hold else None
+        form = BookingForm(initial={'notes': staged.notes} if staged else None)
     
     return render(request, 'events/booking_step1.html', {'event': event, 'form': form})
 
 
+def get_active_booking(request, hold_id):
+    hold = get_object_or_404(BookingHold.objects.select_related('event'), id=hold_id, user=request.user)
+    staged = get_staged_booking(request.session, hold)
+    if hold.is_expired or staged is None:
+        expire_hold(hold)
+        unstage_booking(request.session, hold.id)
+        messages.error(request, 'Your booking session has expired and the seat was released. Please book again.')
+        return None, redirect('event_detail', event_id=hold.event_id)
+    return staged, None
+
+
 @login_required
-def booking_step2(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+def booking_step2(request, hold_id):
+    staged, expired_response = get_active_booking(request, hold_id)
+    if expired_response:
+        return expired_response
+    
+    catalog = get_package_catalog()
     
     if request.method == 'POST':
-        # Clear existing services
-        BookingService.objects.filter(booking=booking).delete()
-        total_addon = 0
+        services = []
         
         # Handle Photography
         photography_package_id = request.POST.get('photography_package')
         if photography_package_id:
-            try:
-                package = PhotographyPackage.objects.get(id=photography_package_id, is_active=True)
-                service = BookingService.objects.create(
-                    booking=booking,
+            package = catalog.get_photography_package(photography_package_id)
+            if package:
+                services.append(serialize_service(
                     service_type='photography',
-                    photography_package=package,
+                    photography_package_id=package.id,
                     photo_type=request.POST.get('photo_type', ''),
                     duration=request.POST.get('duration', ''),
                     delivery_method=request.POST.get('delivery_method', ''),
                     service_price=package.price
-                )
-                total_addon += package.price
-            except PhotographyPackage.DoesNotExist:
-                pass
+                ))
         
         # Handle Catering
         catering_package_id = request.POST.get('catering_package')
         plate_count = request.POST.get('plate_count')
         if catering_package_id and plate_count:
             try:
-                package = CateringPackage.objects.get(id=catering_package_id, is_active=True)
+                package = catalog.get_catering_package(catering_package_id)
                 plate_count = int(plate_count)
-                if plate_count > 0:
-                    service = BookingService.objects.create(
-                        booking=booking,
+                if package and plate_count > 0:
+                    services.append(serialize_service(
                         service_type='catering',
-                        catering_package=package,
+                        catering_package_id=package.id,
                         food_type=request.POST.get('food_type', ''),
                         plate_count=plate_count,
                         service_price=package.price_per_plate * plate_count
-                    )
-                    total_addon += package.price_per_plate * plate_count
-            except (CateringPackage.DoesNotExist, ValueError):
+                    ))
+            except ValueError:
                 pass
         
-        booking.total_amount = booking.event_fee + total_addon
-        booking.save()
+        # Only the session changes until the booking is confirmed
+        stage_booking(request.session, staged.hold, services=services)
         
-        return redirect('booking_step3', booking_id=booking.id)
+        return redirect('booking_step3', hold_id=staged.id)
     
     photography_form = PhotographyServiceForm()
     catering_form = CateringServiceForm()
-    photography_packages = PhotographyPackage.objects.filter(is_active=True)
-    catering_packages = CateringPackage.objects.filter(is_active=True)
+    photography_packages = catalog.photography_packages
+    catering_packages = catalog.catering_packages
     
     return render(request, 'events/booking_step2.html', {
-        'booking': booking,
+        'booking': staged,
         'photography_form': photography_form,
         'catering_form': catering_form,
         'photography_packages': photography_packages,
@@ -256,70 +303,235 @@ def booking_step2(request, booking_id):
 
 
 @login_required
-def booking_step3(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    services = booking.services.all()
+def booking_step3(request, hold_id):
+    staged, expired_response = get_active_booking(request, hold_id)
+    if expired_response:
+        return expired_response
     
     return render(request, 'events/booking_step3.html', {
-        'booking': booking,
-        'services': services,
+        'booking': staged,
+        'services': staged.build_services(),
+        'is_hold': True,
     })
 
 
 @login_required
-def booking_confirm(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    booking.status = 'pending'
-    booking.save()
+def booking_confirm(request, hold_id):
+    staged, expired_response = get_active_booking(request, hold_id)
+    if expired_response:
+        return expired_response
+    
+    try:
+        confirm_booking(staged)
+    except HoldExpired:
+        messages.error(request, 'Your booking session has expired and the seat was released. Please book again.')
+        return redirect('event_detail', event_id=staged.event.id)
+    finally:
+        unstage_booking(request.session, staged.id)
     messages.success(request, 'Booking submitted successfully! Waiting for admin approval.')
     return redirect('my_bookings')
 
 
+@login_required
+def booking_detail(request, booking_id):
+    booking = get_object_or_404(Booking.objects.select_related('event'), id=booking_id, user=request.user)
+    services = booking.services.select_related('photography_package', 'catering_package')
+    
+    return render(request, 'events/booking_step3.html', {
+        'booking': booking,
+        'services': services,
+    })
+
+
 @login_required
 def my_bookings(request):
-    bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')
+    bookings = Booking.objects.filter(user=request.user).select_related('event').order_by('-booking_date')
     return render(request, 'events/my_bookings.html', {'bookings': bookings})
 
 
+@login_required
+@require_safe
+def booking_ticket_qr(request, booking_id):
+    # Loaded by the browser only when a ticket is opened on My Bookings
+    booking = get_object_or_404(
+        Booking.objects.only('id', 'event_id'), id=booking_id, user=request.user, status='confirmed',
+    )
+    response = HttpResponse(checkin_qr_svg(make_checkin_token(booking)), content_type='image/svg+xml')
+    patch_cache_control(response, private=True, max_age=settings.CHECKIN_QR_CACHE_TIMEOUT)
+    return response
+
+
+# Check-in API (used by door scanners; authenticated with X-Checkin-Key, no session)
+def checkin_authorized(request):
+    key = request.headers.get('X-Checkin-Key', '')
+    return bool(key) and any(constant_time_compare(key, allowed) for allowed in settings.CHECKIN_API_KEYS)
+
+
+def read_checkin_payload(request):
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return None, None
+    if not isinstance(payload, dict):
+        return None, None
+    try:
+        event_id = int(payload['event']) if payload.get('event') is not None else None
+    except (TypeError, ValueError):
+        return None, None
+    return payload, event_id
+
+
+@sessionless
+@csrf_exempt
+@require_POST
+def api_checkin(request):
+    if not checkin_authorized(request):
+        return JsonResponse({'error': 'Invalid check-in key.'}, status=403)
+    payload, event_id = read_checkin_payload(request)
+    if payload is None or not payload.get('token'):
+        return JsonResponse({'error': 'Expected a JSON object with a "token".'}, status=400)
+    return JsonResponse(check_in(payload['token'], event_id))
+
+
+@sessionless
+@csrf_exempt
+@require_POST
+def api_checkin_batch(request):
+    if not checkin_authorized(request):
+        return JsonResponse({'error': 'Invalid check-in key.'}, status=403)
+    payload, event_id = read_checkin_payload(request)
+    tokens = payload.get('tokens') if payload else None
+    if not isinstance(tokens, list) or not all(isinstance(token, str) for token in tokens):
+        return JsonResponse({'error': 'Expected a JSON object with a "tokens" list.'}, status=400)
+    if len(tokens) > settings.CHECKIN_BATCH_LIMIT:
+        return JsonResponse({'error': f'At most {settings.CHECKIN_BATCH_LIMIT} tokens per batch.'}, status=400)
+    results = check_in_batch(tokens, event_id)
+    checked_in = sum(1 for result in results if result['result'] == 'checked_in')
+    return JsonResponse({'checked_in': checked_in, 'results': results})
+
+
+# Read API (JSON for the mobile app; authenticated with a bearer token from api_token, no session)
+@sessionless
+@csrf_exempt
+@require_POST
+def api_token(request):
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or not payload.get('username') or not payload.get('password'):
+        return JsonResponse({'error': 'Expected a JSON object with "username" and "password".'}, status=400)
+    username = str(payload['username'])
+
+    throttle = LoginThrottle(request, username)
+    if throttle.locked_until() or throttle.ip_blocked():
+        return JsonResponse({'error': 'Too many failed login attempts. Please try again later.'}, status=429)
+    user = authenticate(request, username=username, password=str(payload['password']))
+    if user is None:
+        throttle.record_failure()
+        return JsonResponse({'error': 'Invalid credentials.'}, status=401)
+    throttle.reset()
+    return JsonResponse({'token': make_api_token(user), 'expires_in': settings.API_TOKEN_MAX_AGE})
+
+
+@sessionless
+@require_safe
+def api_events(request):
+    try:
+        user = get_api_user(request)
+        return api_response(request, api.event_list(request, EventSearchForm(request.GET), user))
+    except APIError as error:
+        return JsonResponse({'error': str(error)}, status=error.status)
+
+
+@sessionless
+@require_safe
+def api_event_detail(request, event_id):
+    try:
+        user = get_api_user(request)
+        return api_response(request, api.event_detail(request, event_id, user))
+    except APIError as error:
+        return JsonResponse({'error': str(error)}, status=error.status)
+
+
+@sessionless
+@require_safe
+def api_bookings(request):
+    try:
+        user = get_api_user(request)
+        if user is None:
+            raise APIError('Authentication required.', status=401)
+        return api_response(request, api.user_bookings(request, user))
+    except APIError as error:
+        return JsonResponse({'error': str(error)}, status=error.status)
+
+
 # Admin Side Views
 @login_required
 @user_passes_test(is_staff_or_admin)
 def admin_dashboard(request):
-    total_events = Event.objects.count()
-    total_bookings = Booking.objects.count()
-    total_users = User.objects.count()
-    upcoming_events = Event.objects.filter(date__gte=timezone.now().date()).count()
-    recent_registrations = Booking.objects.filter(
-        booking_date__gte=timezone.now() - timedelta(days=7)
-    ).count()
+    # Totals and chart data come from the rollup tables maintained in events.rollups
+    today = timezone.localdate()
+    counters = rollups.get_counters(rollups.TOTAL_EVENTS, rollups.TOTAL_BOOKINGS, rollups.TOTAL_USERS)
+    # Stays a live count: it only reads the event_date_idx range from today on,
+    # and a stored counter would go stale every midnight as events pass
+    upcoming_events = Event.objects.filter(date__gte=today).count()
     
     # Monthly bookings data for chart
-    monthly_bookings = Booking.objects.filter(
-        booking_date__gte=timezone.now() - timedelta(days=30)
-    ).values('booking_date__date').annotate(count=Count('id')).order_by('booking_date__date')
+    daily_counts = rollups.daily_booking_counts(today - timedelta(days=29), today)
+    recent_registrations = sum(count for day, count in daily_counts if day > today - timedelta(days=7))
+    monthly_bookings = [
+        {'booking_date__date': day.isoformat(), 'count': count} for day, count in daily_counts
+    ]
     
     # Event-wise registrations
-    event_registrations = Event.objects.annotate(
-        booking_count=Count('booking')
-    ).order_by('-booking_count')[:10]
+    event_registrations = rollups.top_events(10)
     
     context = {
-        'total_events': total_events,
-        'total_bookings': total_bookings,
-        'total_users': total_users,
+        'total_events': counters[rollups.TOTAL_EVENTS],
+        'total_bookings': counters[rollups.TOTAL_BOOKINGS],
+        'total_users': counters[rollups.TOTAL_USERS],
         'upcoming_events': upcoming_events,
         'recent_registrations': recent_registrations,
-        'monthly_bookings': mark_safe(json.dumps(list(monthly_bookings))),
+        'monthly_bookings': mark_safe(json.dumps(monthly_bookings)),
         'event_registrations': event_registrations,
     }
     
     return render(request, 'events/admin/dashboard.html', context)
 
 
+@login_required
+@user_passes_test(is_staff_or_admin)
+def admin_reports(request):
+    # Answered from the daily fact table in events.reports, never from Booking
+    form = ReportForm(request.GET)
+    options = form.get_options()
+    statuses = options['status'] or None
+
+    totals = reports.summary(options['start'], options['end'], statuses)
+    rows = reports.breakdown(options['group'], options['start'], options['end'], statuses)
+
+    context = {
+        'form': form,
+        'start': options['start'],
+        'end': options['end'],
+        'group': options['group'],
+        'totals': totals,
+        'rows': rows,
+        # Rendered with json_script, since labels include event titles
+        'chart_data': {
+            'labels': [str(row['label']) for row in rows],
+            'revenue': [float(row['revenue']) for row in rows],
+            'bookings': [row['bookings'] for row in rows],
+        },
+    }
+    return render(request, 'events/admin/reports.html', context)
+
+
 @login_required
 @user_passes_test(is_admin)
 def admin_events(request):
-    events = Event.objects.all().order_by('-created_at')
+    events = Event.objects.select_related('category').order_by('-created_at')
     return render(request, 'events/admin/events.html', {'events': events})
 
 
@@ -354,6 +566,53 @@ def admin_event_edit(request, event_id):
     return render(request, 'events/admin/event_form.html', {'form': form, 'title': 'Edit Event', 'event': event})
 
 
+def video_upload_status(upload):
+    return {
+        'id': str(upload.id),
+        'offset': upload.received,
+        'size': upload.size,
+        'complete': upload.is_complete,
+        'chunk_size': settings.VIDEO_UPLOAD_CHUNK_SIZE,
+    }
+
+
+@login_required
+@user_passes_test(is_admin)
+@require_POST
+def admin_video_upload_create(request):
+    # Starts a chunked upload; the event form attaches the finished video by its id
+    try:
+        payload = json.loads(request.body)
+        filename, size = str(payload['filename']), int(payload['size'])
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Expected {"filename": ..., "size": ...}.'}, status=400)
+    try:
+        upload = create_upload(request.user, filename, size)
+    except UploadError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    return JsonResponse(video_upload_status(upload), status=201)
+
+
+@login_required
+@user_passes_test(is_admin)
+@require_http_methods(['GET', 'PUT'])
+def admin_video_upload(request, upload_id):
+    # GET reports the offset to resume from; PUT appends the chunk named by Content-Range
+    if request.method == 'PUT':
+        try:
+            upload = append_chunk(upload_id, request.user, request.headers.get('Content-Range'), request)
+        except UploadError as exc:
+            upload = VideoUpload.objects.filter(id=upload_id, user=request.user).first()
+            return JsonResponse({
+                'error': str(exc),
+                'offset': upload.received if upload else None,
+            }, status=exc.status)
+        return JsonResponse(video_upload_status(upload))
+    
+    upload = get_object_or_404(VideoUpload, id=upload_id, user=request.user)
+    return JsonResponse(video_upload_status(upload))
+
+
 @login_required
 @user_passes_test(is_admin)
 def admin_event_delete(request, event_id):
@@ -368,32 +627,23 @@ def admin_event_delete(request, event_id):
 @login_required
 @user_passes_test(is_staff_or_admin)
 def admin_bookings(request):
-    bookings = Booking.objects.all().order_by('-booking_date')
-    
-    # Filters
-    event_filter = request.GET.get('event')
-    status_filter = request.GET.get('status')
-    date_filter = request.GET.get('date')
-    
-    if event_filter:
-        bookings = bookings.filter(event_id=event_filter)
-    if status_filter:
-        bookings = bookings.filter(status=status_filter)
-    if date_filter:
-        bookings = bookings.filter(booking_date__date=date_filter)
+    bookings, filters = filter_bookings(Booking.objects.select_related('user', 'event'), request.GET)
     
-    paginator = Paginator(bookings, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(bookings, 20, ('-booking_date', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    total_count, count_is_capped = paginator.approximate_count()
     
     events = Event.objects.all()
     
     return render(request, 'events/admin/bookings.html', {
         'page_obj': page_obj,
         'events': events,
-        'status_filter': status_filter,
-        'event_filter': event_filter,
-        'date_filter': date_filter,
+        'status_filter': filters['status'],
+        'event_filter': filters['event'],
+        'date_filter': filters['date'],
+        'total_count': total_count,
+        'count_is_capped': count_is_capped,
+        'filter_query': querystring_without(request, 'cursor', 'page'),
     })
 
 
@@ -405,7 +655,7 @@ def admin_booking_update_status(request, booking_id):
         status = request.POST.get('status')
         if status in dict(Booking.STATUS_CHOICES):
             booking.status = status
-            booking.save()
+            booking.save(update_fields=['status'])
             messages.success(request, f'Booking status updated to {status}.')
     return redirect('admin_bookings')
 
@@ -415,103 +665,108 @@ def admin_booking_update_status(request, booking_id):
 def admin_booking_mark_attendance(request, booking_id):
     booking = get_object_or_404(Booking, id=booking_id)
     booking.attendance_marked = True
-    booking.save()
+    booking.save(update_fields=['attendance_marked'])
     messages.success(request, 'Attendance marked successfully!')
     return redirect('admin_bookings')
 
 
+def get_bulk_selection(request):
+    # Either the ticked rows, or every booking matching the list filters
+    bookings, filters = filter_bookings(Booking.objects.all(), request.POST)
+    if request.POST.get('select_all') != '1':
+        bookings = bookings.filter(id__in=[
+            booking_id for booking_id in request.POST.getlist('booking_ids') if booking_id.isdigit()
+        ])
+    return bookings, filters
+
+
+def bulk_response(request, updated, message, filters):
+    if request.headers.get('Accept') == 'application/json':
+        return JsonResponse({'updated': updated})
+    messages.success(request, message)
+    query = urlencode({key: value for key, value in filters.items() if value})
+    return redirect(f"{reverse('admin_bookings')}?{query}" if query else 'admin_bookings')
+
+
 @login_required
 @user_passes_test(is_staff_or_admin)
-def admin_booking_export_excel(request):
-    bookings = Booking.objects.all().order_by('-booking_date')
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Bookings"
-    
-    # Headers
-    ws.append(['User', 'Event', 'Status', 'Event Fee', 'Total Amount', 'Booking Date', 'Attendance'])
-    
-    # Data
-    for booking in bookings:
-        ws.append([
-            booking.user.username,
-            booking.event.title,
-            booking.status,
-            float(booking.event_fee),
-            float(booking.total_amount),
-            booking.booking_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'Yes' if booking.attendance_marked else 'No'
-        ])
+@require_POST
+def admin_booking_bulk_status(request):
+    bookings, filters = get_bulk_selection(request)
+    status = request.POST.get('new_status')
+    if status not in dict(Booking.STATUS_CHOICES):
+        return HttpResponseBadRequest('Invalid status')
+    updated = bulk_update_status(bookings, status)
+    return bulk_response(request, updated, f'{updated} booking{pluralize(updated)} updated to {status}.', filters)
+
+
+@login_required
+@user_passes_test(is_staff_or_admin)
+@require_POST
+def admin_booking_bulk_attendance(request):
+    bookings, filters = get_bulk_selection(request)
+    updated = bulk_mark_attendance(bookings)
+    return bulk_response(request, updated, f'Attendance marked for {updated} booking{pluralize(updated)}.', filters)
+
+
+def booking_report_response(request, extension, filename, content_type, label):
+    # Reports are written by the export_bookings_* commands, never inside the request
+    form = BookingFilterForm(request.GET)
+    if not form.is_valid():
+        messages.error(request, f'The {label} could not be started: the booking filters are invalid.')
+        return redirect('admin_bookings')
+    filters = form.get_filters()
+    report_path = booking_report_path(filters, extension)
+    
+    if is_report_fresh(report_path):
+        return FileResponse(open(report_path, 'rb'), as_attachment=True, filename=filename,
+                            content_type=content_type)
     
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=bookings.xlsx'
-    wb.save(response)
-    return response
+    try:
+        started = start_booking_report(filters, extension)
+    except ReportQueueFull:
+        messages.warning(request, 'Too many reports are being generated right now. Please try again in a minute.')
+    else:
+        if started:
+            messages.info(request, f'The {label} is being generated. Click the export button again in a moment to download it.')
+        else:
+            messages.info(request, f'The {label} is still being generated. Please try again shortly.')
+    return redirect(f"{reverse('admin_bookings')}?{querystring_without(request, 'cursor')}")
+
+
+@login_required
+@user_passes_test(is_staff_or_admin)
+def admin_booking_export_excel(request):
+    return booking_report_response(
+        request, 'xlsx', 'bookings.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'Excel export',
+    )
 
 
 @login_required
 @user_passes_test(is_staff_or_admin)
 def admin_booking_export_pdf(request):
-    bookings = Booking.objects.all().order_by('-booking_date')
-    
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename=bookings.pdf'
-    
-    doc = SimpleDocTemplate(response, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    elements.append(Paragraph("Bookings Report", styles['Title']))
-    elements.append(Spacer(1, 12))
-    
-    # Table data
-    data = [['User', 'Event', 'Status', 'Total Amount', 'Date']]
-    for booking in bookings:
-        data.append([
-            booking.user.username,
-            booking.event.title,
-            booking.status,
-            str(booking.total_amount),
-            booking.booking_date.strftime('%Y-%m-%d')
-        ])
-    
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    return response
+    return booking_report_response(request, 'pdf', 'bookings.pdf', 'application/pdf', 'PDF report')
 
 
 @login_required
 @user_passes_test(is_admin)
 def admin_users(request):
-    users = User.objects.all().order_by('-date_joined')
+    users = User.objects.select_related('userprofile').order_by('-date_joined')
     return render(request, 'events/admin/users.html', {'users': users})
 
 
 @login_required
 @user_passes_test(is_admin)
 def admin_user_toggle_active(request, user_id):
-    user = get_object_or_404(User, id=user_id)
+    user = get_object_or_404(User.objects.select_related('userprofile'), id=user_id)
     try:
         profile = user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, 'User profile not found.')
+    else:
         profile.is_active = not profile.is_active
-        profile.save()
+        profile.save(update_fields=['is_active'])
         messages.success(request, f'User {"activated" if profile.is_active else "deactivated"} successfully!')
-    except:
-        messages.error(request, 'User profile not found.')
     return redirect('admin_users')
 
 
@@ -519,7 +774,7 @@ def admin_user_toggle_active(request, user_id):
 @user_passes_test(is_admin)
 def admin_user_bookings(request, user_id):
     user = get_object_or_404(User, id=user_id)
-    bookings = Booking.objects.filter(user=user).order_by('-booking_date')
+    bookings = Booking.objects.filter(user=user).select_related('event').order_by('-booking_date')
     return render(request, 'events/admin/user_bookings.html', {'user': user, 'bookings': bookings})
 
 
@@ -571,3 +826,15 @@ def admin_catering_create(request):
         'service_type': 'catering'
     })
 
+
+@sessionless
+def metrics(request):
+    # Prometheus scrape endpoint; needs METRICS_TOKEN as a bearer token
+    # outside of DEBUG
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}'):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
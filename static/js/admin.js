@@ -0,0 +1,12 @@
+// Admin panel sidebar toggle
+
+document.addEventListener('DOMContentLoaded', function() {
+    const toggle = document.getElementById('sidebarCollapse');
+    if (!toggle) {
+        return;
+    }
+    toggle.addEventListener('click', function() {
+        document.getElementById('sidebar').classList.toggle('active');
+        document.getElementById('content').classList.toggle('active');
+    });
+});